@@ -2,12 +2,25 @@
 ML Disease Prediction API - Refactored Version
 A Flask-based API for predicting diseases based on symptoms using machine learning.
 """
+import atexit
+import hmac
 import logging
+import os
+from functools import partial
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 from config import config
 from services.data_service import DataService
-from services.prediction_service import PredictionService
+from services.prediction_service import PredictionService, load_model_file, load_model_version
+from services.audit_service import AuditLogger
+from services.ensemble_service import EnsemblePredictor
+from services.drift_monitor import DriftMonitor
+from services.model_store import ModelStore
+from services.segment_store import SegmentStore
+from services.threading_policy import ThreadingPolicy
+from services.profiling_service import (
+    BackgroundSampler, current_rss_bytes, format_collapsed, profile_call, sample_stacks
+)
 
 # Configure logging
 logging.basicConfig(
@@ -19,20 +32,63 @@ logger = logging.getLogger(__name__)
 def create_app(config_name='default'):
     """Application factory pattern"""
     app = Flask(__name__)
-    app.config.from_object(config[config_name])
+    settings = config[config_name]
+    app.config.from_object(settings)
     
     # Enable CORS
     CORS(app)
     
+    # Pin native thread pools before any model is loaded or run
+    threading_policy = None
+    if settings.THREADING_POLICY_ENABLED:
+        threading_policy = ThreadingPolicy.from_config(settings).apply()
+    
     # Initialize services
     try:
-        data_service = DataService(app.config)
-        prediction_service = PredictionService(app.config, data_service)
+        # Services read settings as attributes, which Flask's dict-based config lacks
+        data_service = DataService(settings)
+        segment_store = None
+        if settings.DATASET_SEGMENTS_DIR:
+            segment_store = SegmentStore.from_config(settings)
+            data_service.attach_segment_store(segment_store)
+            if settings.SEGMENT_REFRESH_INTERVAL:
+                data_service.start_segment_refresh(settings.SEGMENT_REFRESH_INTERVAL)
+            if settings.SEGMENT_COMPACT_INTERVAL:
+                segment_store.start_compaction(settings.SEGMENT_COMPACT_INTERVAL,
+                                               settings.SEGMENT_COMPACT_MIN)
+        if settings.DATA_SERVING_MODE:
+            data_service.to_serving_mode()
+        audit_logger = AuditLogger.from_config(settings) if settings.AUDIT_ENABLED else None
+        if audit_logger is not None:
+            atexit.register(audit_logger.close)
+        ensemble = None
+        if settings.ENSEMBLE_MODELS:
+            ensemble = EnsemblePredictor.from_config(settings, partial(
+                load_model_file, clear_n_jobs=threading_policy is not None))
+        drift_monitor = None
+        if settings.DRIFT_ENABLED:
+            drift_monitor = DriftMonitor.from_config(settings, data_service.get_symptoms_list())
+            drift_monitor.start()
+        model_store = None
+        if settings.MODEL_VERSIONS and ensemble is None:
+            model_store = ModelStore.from_config(settings, partial(
+                load_model_version, explanations=settings.EXPLANATIONS_ENABLED,
+                clear_n_jobs=threading_policy is not None))
+        prediction_service = PredictionService(settings, data_service, audit_logger, ensemble,
+                                               drift_monitor, model_store, threading_policy)
         logger.info("Services initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize services: {str(e)}")
         raise
     
+    # Profiling stays off the hot path unless explicitly enabled with a token
+    profiling_enabled = bool(settings.PROFILING_ENABLED and settings.ADMIN_TOKEN)
+    
+    def is_admin():
+        """Check the X-Admin-Token header against the configured token"""
+        token = request.headers.get('X-Admin-Token', '')
+        return hmac.compare_digest(token.encode(), (settings.ADMIN_TOKEN or '').encode())
+    
     @app.route('/health', methods=['GET'])
     def health_check():
         """Health check endpoint"""
@@ -86,8 +142,30 @@ def create_app(config_name='default'):
                     "error": "At least one symptom is required"
                 }), 400
             
+            explain = data.get('explain', False)
+            if not isinstance(explain, bool):
+                return jsonify({
+                    "error": "Explain must be a boolean"
+                }), 400
+            
             # Make prediction
-            result = prediction_service.predict_disease(symptoms)
+            options = {
+                "explain": explain,
+                "version": request.headers.get(settings.MODEL_VERSION_HEADER),
+                "routing_key": request.headers.get(settings.MODEL_ROUTING_KEY_HEADER),
+            }
+            if profiling_enabled and 'X-Profile' in request.headers:
+                if not is_admin():
+                    return jsonify({
+                        "error": "Admin token required for profiling"
+                    }), 403
+                result, profile = profile_call(
+                    prediction_service.predict_disease, symptoms, **options,
+                    sort=request.headers.get('X-Profile-Sort', 'cumulative')
+                )
+                result = dict(result, profile=profile)
+            else:
+                result = prediction_service.predict_disease(symptoms, **options)
             
             return jsonify(result), 200
             
@@ -104,11 +182,60 @@ def create_app(config_name='default'):
                 "message": "An error occurred while processing your request"
             }), 500
     
+    @app.route('/predict/batch', methods=['POST'])
+    def predict_batch():
+        """Predict diseases for several symptom lists in one model call"""
+        try:
+            if not request.is_json:
+                return jsonify({
+                    "error": "Content-Type must be application/json"
+                }), 400
+            
+            data = request.get_json()
+            batch = data.get('requests') if isinstance(data, dict) else None
+            if not isinstance(batch, list) or not batch:
+                return jsonify({
+                    "error": "Body must contain a non-empty 'requests' list"
+                }), 400
+            
+            if not all(isinstance(symptoms, list) for symptoms in batch):
+                return jsonify({
+                    "error": "Each request must be a list of symptoms"
+                }), 400
+            
+            if len(batch) > settings.MAX_BATCH_SIZE:
+                return jsonify({
+                    "error": f"At most {settings.MAX_BATCH_SIZE} requests per batch"
+                }), 400
+            
+            results = prediction_service.predict_batch(
+                batch,
+                version=request.headers.get(settings.MODEL_VERSION_HEADER),
+                routing_key=request.headers.get(settings.MODEL_ROUTING_KEY_HEADER),
+            )
+            return jsonify({
+                "results": results,
+                "count": len(results)
+            }), 200
+            
+        except ValueError as e:
+            logger.warning(f"Validation error: {str(e)}")
+            return jsonify({
+                "error": "Invalid input",
+                "message": str(e)
+            }), 400
+        except Exception as e:
+            logger.error(f"Error in batch prediction: {str(e)}")
+            return jsonify({
+                "error": "Internal server error",
+                "message": "An error occurred while processing your request"
+            }), 500
+    
     @app.route('/diseases', methods=['GET'])
     def get_diseases():
         """Get list of all diseases that can be predicted"""
         try:
-            diseases = data_service.df['Disease'].unique().tolist()
+            diseases = data_service.get_diseases()
             return jsonify({
                 "diseases": diseases,
                 "count": len(diseases)
@@ -120,6 +247,166 @@ def create_app(config_name='default'):
                 "message": str(e)
             }), 500
     
+    @app.route('/ensemble/metrics', methods=['GET'])
+    def get_ensemble_metrics():
+        """Get per-model timing metrics of the serving ensemble"""
+        if ensemble is None:
+            return jsonify({
+                "error": "Ensemble serving is not enabled"
+            }), 404
+        return jsonify({
+            "method": ensemble.method,
+            "models": ensemble.get_metrics()
+        }), 200
+    
+    @app.route('/models', methods=['GET'])
+    def get_model_versions():
+        """Get routing, load and latency metrics of the registered model versions"""
+        if model_store is None:
+            return jsonify({
+                "error": "Model versions are not configured"
+            }), 404
+        return jsonify(model_store.get_metrics()), 200
+    
+    @app.route('/drift', methods=['GET'])
+    def get_drift():
+        """Get drift scores of live traffic against the training data"""
+        if drift_monitor is None:
+            return jsonify({
+                "error": "Drift monitoring is not enabled"
+            }), 404
+        try:
+            # Sampled requests and unknown symptom strings are caller input
+            include_requests = bool(settings.ADMIN_TOKEN) and is_admin()
+            if request.args.get('refresh', '').lower() in ('1', 'true', 'yes'):
+                report = drift_monitor.compute_report(include_requests)
+            else:
+                report = drift_monitor.get_report(include_requests)
+            return jsonify(report), 200
+        except Exception as e:
+            logger.error(f"Error computing drift report: {str(e)}")
+            return jsonify({
+                "error": "Failed to compute drift report",
+                "message": str(e)
+            }), 500
+    
+    if profiling_enabled:
+        background_sampler = BackgroundSampler(settings.PROFILING_OUTPUT_DIR)
+        
+        @app.route('/admin/profile', methods=['GET'])
+        def profile_process():
+            """Sample this worker's stacks for N seconds and return collapsed stacks"""
+            if not is_admin():
+                return jsonify({
+                    "error": "Admin token required for profiling"
+                }), 403
+            try:
+                seconds = float(request.args.get('seconds', 5))
+                interval = float(request.args.get('interval', settings.PROFILING_SAMPLE_INTERVAL))
+            except ValueError:
+                return jsonify({
+                    "error": "seconds and interval must be numbers"
+                }), 400
+            if not 0 < seconds <= settings.PROFILING_MAX_SECONDS or interval <= 0:
+                return jsonify({
+                    "error": f"seconds must be between 0 and {settings.PROFILING_MAX_SECONDS}"
+                }), 400
+            
+            # Synchronous workers cannot serve traffic while this request
+            # blocks, so sample in the background and write to a file instead
+            if request.args.get('background', '').lower() in ('1', 'true', 'yes'):
+                try:
+                    path = background_sampler.start(seconds, interval)
+                except RuntimeError as e:
+                    return jsonify({
+                        "error": str(e)
+                    }), 409
+                return jsonify({
+                    "status": "started",
+                    "pid": os.getpid(),
+                    "seconds": seconds,
+                    "path": path
+                }), 202
+            
+            stacks = sample_stacks(seconds, interval)
+            return app.response_class(format_collapsed(stacks), mimetype='text/plain')
+    
+    if settings.INGEST_ENABLED and segment_store is not None and settings.ADMIN_TOKEN:
+        @app.route('/ingest', methods=['POST'])
+        def ingest_records():
+            """Append newly labeled records to the dataset without a reload"""
+            if not is_admin():
+                return jsonify({
+                    "error": "Admin token required"
+                }), 403
+            
+            if not request.is_json:
+                return jsonify({
+                    "error": "Content-Type must be application/json"
+                }), 400
+            
+            data = request.get_json()
+            records = data.get('records') if isinstance(data, dict) else None
+            if not isinstance(records, list) or not records:
+                return jsonify({
+                    "error": "Body must contain a non-empty 'records' list"
+                }), 400
+            
+            if len(records) > settings.INGEST_MAX_RECORDS:
+                return jsonify({
+                    "error": f"At most {settings.INGEST_MAX_RECORDS} records per request"
+                }), 400
+            
+            try:
+                result = data_service.ingest(records)
+                return jsonify(result), 201
+            except ValueError as e:
+                return jsonify({
+                    "error": "Invalid input",
+                    "message": str(e)
+                }), 400
+            except Exception as e:
+                logger.error(f"Error ingesting records: {str(e)}")
+                return jsonify({
+                    "error": "Internal server error",
+                    "message": "An error occurred while ingesting the records"
+                }), 500
+    
+    if settings.MEMORY_DEBUG_ENABLED and settings.ADMIN_TOKEN:
+        @app.route('/debug/memory', methods=['GET'])
+        def get_memory_usage():
+            """Report the deep size of the data held by this worker"""
+            if not is_admin():
+                return jsonify({
+                    "error": "Admin token required"
+                }), 403
+            structures = data_service.get_memory_usage()
+            return jsonify({
+                "pid": os.getpid(),
+                "rss_bytes": current_rss_bytes(),
+                "serving_mode": data_service.serving_mode,
+                "structures": structures,
+                "total_bytes": sum(structures.values())
+            }), 200
+    
+    if settings.THREADS_DEBUG_ENABLED and settings.ADMIN_TOKEN:
+        @app.route('/debug/threads', methods=['GET'])
+        def get_thread_settings():
+            """Report the threading policy and the native thread pools of this worker"""
+            if not is_admin():
+                return jsonify({
+                    "error": "Admin token required"
+                }), 403
+            if threading_policy is None:
+                return jsonify({
+                    "error": "Threading policy is not enabled"
+                }), 404
+            return jsonify({
+                "pid": os.getpid(),
+                "policy": threading_policy.describe(),
+                "threadpools": threading_policy.threadpool_info()
+            }), 200
+    
     @app.errorhandler(404)
     def not_found(error):
         """Handle 404 errors"""
@@ -0,0 +1,86 @@
+"""
+Benchmark /predict service latency with the audit log off and on
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_audit [--requests 1000] [--rounds 5] [--joblib]
+
+Rounds alternate between auditing off and on so drift affects both equally.
+The noise band is the spread of per-round p50 latency with auditing off; the
+audit overhead is reported as within noise when the p50 difference is
+smaller than that spread.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+from benchmarks.common import benchmark_config, build_services, latency_stats, sample_requests
+from services.audit_service import AuditLogger
+
+
+def _run(prediction_service, requests) -> list:
+    timings = []
+    for symptoms in requests:
+        start = time.perf_counter()
+        prediction_service.predict_disease(symptoms)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmark(request_count: int = 1000, rounds: int = 5, compact: bool = True) -> dict:
+    config = benchmark_config(compact=compact)
+    requests = sample_requests(config, request_count)
+    _, prediction_service = build_services(config)
+
+    with tempfile.TemporaryDirectory() as directory:
+        audit_logger = AuditLogger(os.path.join(directory, 'audit.db'),
+                                   queue_size=request_count * 2)
+        _run(prediction_service, requests[:100])  # warm-up
+
+        results = {"off": [], "on": []}
+        for round_index in range(rounds):
+            order = ("off", "on") if round_index % 2 == 0 else ("on", "off")
+            for mode in order:
+                prediction_service.audit_logger = audit_logger if mode == "on" else None
+                results[mode].append(_run(prediction_service, requests))
+            audit_logger.flush()
+
+        audit_logger.close()
+        audit_stats = audit_logger.get_stats()
+
+    off_p50s = [np.percentile(timings, 50) * 1000 for timings in results["off"]]
+    off = latency_stats(np.concatenate(results["off"]))
+    on = latency_stats(np.concatenate(results["on"]))
+    noise_ms = float(max(off_p50s) - min(off_p50s))
+    delta_ms = on["p50_ms"] - off["p50_ms"]
+    return {
+        "requests_per_round": request_count,
+        "rounds": rounds,
+        "model_format": "compact" if compact else "joblib",
+        "audit_off": off,
+        "audit_on": on,
+        "p50_delta_ms": delta_ms,
+        "p99_delta_ms": on["p99_ms"] - off["p99_ms"],
+        "noise_band_ms": noise_ms,
+        "within_noise": abs(delta_ms) <= noise_ms,
+        "audit": audit_stats,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per round')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--joblib', action='store_true',
+                        help='Serve the sklearn joblib model instead of the compact forest')
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run_benchmark(args.requests, args.rounds, compact=not args.joblib), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
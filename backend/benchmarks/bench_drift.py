@@ -0,0 +1,83 @@
+"""
+Benchmark the per-request overhead of the drift monitor
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_drift [--requests 1000] [--rounds 5]
+
+Reports the cost of DriftMonitor.observe on its own, the predict_disease
+latency with monitoring off and on (alternating rounds), and the cost of
+one comparison against the baseline.
+"""
+import argparse
+import json
+import sys
+import time
+import numpy as np
+
+from benchmarks.common import benchmark_config, build_services, latency_stats, sample_requests
+from services.drift_monitor import DriftMonitor
+
+
+def _run(prediction_service, requests) -> list:
+    timings = []
+    for symptoms in requests:
+        start = time.perf_counter()
+        prediction_service.predict_disease(symptoms)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmark(request_count: int = 1000, rounds: int = 5) -> dict:
+    config = benchmark_config(compact=True)
+    requests = sample_requests(config, request_count)
+    data_service, prediction_service = build_services(config)
+    monitor = DriftMonitor.from_config(config, data_service.get_symptoms_list())
+
+    diseases = [str(prediction_service.predict_disease(symptoms)["disease"])
+                for symptoms in requests]
+    observe_timings = []
+    for _ in range(rounds):
+        for symptoms, disease in zip(requests, diseases):
+            start = time.perf_counter()
+            monitor.observe(symptoms, disease)
+            observe_timings.append(time.perf_counter() - start)
+
+    results = {"off": [], "on": []}
+    for round_index in range(rounds):
+        order = ("off", "on") if round_index % 2 == 0 else ("on", "off")
+        for mode in order:
+            prediction_service.drift_monitor = monitor if mode == "on" else None
+            results[mode].append(_run(prediction_service, requests))
+
+    start = time.perf_counter()
+    report = monitor.compute_report()
+    report_ms = (time.perf_counter() - start) * 1000
+
+    observe = latency_stats(observe_timings)
+    off_p50s = [np.percentile(timings, 50) * 1000 for timings in results["off"]]
+    off = latency_stats(np.concatenate(results["off"]))
+    on = latency_stats(np.concatenate(results["on"]))
+    return {
+        "observe": {key.replace('_ms', '_us'): value * 1000 if key != "count" else value
+                    for key, value in observe.items()},
+        "predict_off": off,
+        "predict_on": on,
+        "p50_delta_ms": on["p50_ms"] - off["p50_ms"],
+        "noise_band_ms": float(max(off_p50s) - min(off_p50s)),
+        "compute_report_ms": report_ms,
+        "scores_for_dataset_traffic": report["scores"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run_benchmark(args.requests, args.rounds), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Benchmark ensemble serving against the single forest
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_ensemble [--requests 300] [--joblib]
+
+Compares single-row latency of the forest alone, the SVM from
+model/model.sav alone, the models run one after the other, and the
+concurrent ensemble with voting and probability averaging.
+"""
+import argparse
+import json
+import sys
+import time
+import numpy as np
+
+from benchmarks.common import benchmark_config, build_services, latency_stats, sample_requests
+from services.ensemble_service import EnsemblePredictor
+from services.prediction_service import load_model_file
+
+SVM_PATH = './model/model.sav'
+
+
+def _time(predict, inputs) -> list:
+    timings = []
+    for input_vector in inputs:
+        start = time.perf_counter()
+        predict(input_vector)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_benchmark(request_count: int = 300, compact: bool = True) -> dict:
+    config = benchmark_config(compact=compact)
+    _, prediction_service = build_services(config)
+    inputs = [prediction_service._prepare_input_vector(symptoms)
+              for symptoms in sample_requests(config, request_count)]
+
+    forest = prediction_service.model
+    svm = load_model_file(SVM_PATH)
+    models = [{"name": "forest", "model": forest}, {"name": "svm", "model": svm}]
+
+    def sequential(input_vector):
+        forest.predict(input_vector)
+        svm.predict(input_vector)
+
+    results = {
+        "forest": latency_stats(_time(forest.predict, inputs)),
+        "svm": latency_stats(_time(svm.predict, inputs)),
+        "sequential": latency_stats(_time(sequential, inputs)),
+    }
+    metrics = {}
+    for method in ('vote', 'proba'):
+        ensemble = EnsemblePredictor(models, method=method, default_budget_ms=1000)
+        ensemble.predict(inputs[0])  # start the pool threads
+        results[f"ensemble_{method}"] = latency_stats(_time(ensemble.predict, inputs))
+        metrics[method] = ensemble.get_metrics()
+        ensemble.shutdown()
+
+    single_p50 = results["forest"]["p50_ms"]
+    return {
+        "requests": request_count,
+        "forest_format": "compact" if compact else "joblib",
+        "latency": results,
+        "ensemble_vote_overhead_p50_ms": results["ensemble_vote"]["p50_ms"] - single_p50,
+        "per_model": metrics,
+        "agreement": float(np.mean([
+            str(forest.predict(x)[0]) == str(svm.predict(x)[0]) for x in inputs])),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--joblib', action='store_true',
+                        help='Use the sklearn joblib forest instead of the compact forest')
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run_benchmark(args.requests, compact=not args.joblib), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
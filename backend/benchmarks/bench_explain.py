@@ -0,0 +1,90 @@
+"""
+Benchmark the latency added by per-prediction explanations
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_explain [--requests 500] [--rounds 5]
+
+Reports predict_disease latency without and with ``explain=True``
+(alternating rounds), the cost of TreeExplainer.explain on its own for
+batches of different sizes, the time to precompute the node distributions
+and their size.
+"""
+import argparse
+import json
+import sys
+import time
+import numpy as np
+
+from benchmarks.common import benchmark_config, build_services, latency_stats, sample_requests
+from services.explanation_service import TreeExplainer
+
+
+def _run(prediction_service, requests, explain: bool) -> list:
+    timings = []
+    for symptoms in requests:
+        start = time.perf_counter()
+        prediction_service.predict_disease(symptoms, explain=explain)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _batch_cost(explainer, model, features, batch_size: int, repeat: int = 5) -> dict:
+    batch = features[:batch_size]
+    timings = {"explain": [], "predict_proba": []}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        explainer.explain(batch)
+        timings["explain"].append(time.perf_counter() - start)
+        start = time.perf_counter()
+        model.predict_proba(batch)
+        timings["predict_proba"].append(time.perf_counter() - start)
+    return {name: min(values) * 1e6 / batch_size for name, values in timings.items()}
+
+
+def run_benchmark(request_count: int = 500, rounds: int = 5) -> dict:
+    config = benchmark_config(EXPLANATIONS_ENABLED=True)
+    requests = sample_requests(config, request_count)
+    data_service, prediction_service = build_services(config)
+
+    start = time.perf_counter()
+    explainer = TreeExplainer(prediction_service.model)
+    build_seconds = time.perf_counter() - start
+
+    results = {"plain": [], "explain": []}
+    for round_index in range(rounds):
+        order = ("plain", "explain") if round_index % 2 == 0 else ("explain", "plain")
+        for mode in order:
+            results[mode].append(_run(prediction_service, requests, mode == "explain"))
+
+    features, _ = data_service.get_training_data()
+    plain = latency_stats(np.concatenate(results["plain"]))
+    explained = latency_stats(np.concatenate(results["explain"]))
+    plain_p50s = [np.percentile(timings, 50) * 1000 for timings in results["plain"]]
+    return {
+        "trees": explainer.n_estimators,
+        "nodes": int(len(explainer.value)),
+        "precompute_seconds": build_seconds,
+        "explainer_mb": explainer.nbytes / 1e6,
+        "predict_plain": plain,
+        "predict_explain": explained,
+        "p50_delta_ms": explained["p50_ms"] - plain["p50_ms"],
+        "noise_band_ms": float(max(plain_p50s) - min(plain_p50s)),
+        "us_per_row": {
+            str(size): _batch_cost(explainer, prediction_service.model, features, size)
+            for size in (1, 100, 1000)
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run_benchmark(args.requests, args.rounds), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Benchmark incremental ingestion against reloading the whole dataset
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_ingest [--sizes 1 10 100 1000] [--repeat 3]
+
+For each batch size, "reload" writes the dataset plus the new rows to a CSV
+and builds a fresh DataService in serving mode, which is what a restart
+costs today. "ingest" encodes the same rows, appends them as a segment and
+applies it to an already loaded service. "refresh" is the cost paid by the
+other serving processes, which only read the new segment.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import pandas as pd
+
+from config import Config
+from services.data_service import DataService
+from services.segment_store import SegmentStore
+
+
+def _records(config, count: int, seed: int):
+    raw = pd.read_csv(config.DATASET_PATH)
+    rows = raw.sample(count, replace=True, random_state=seed)
+    records = [{"disease": str(row[0]).strip(),
+                "symptoms": [str(value).strip() for value in row[1:] if pd.notna(value)]}
+               for row in rows.values]
+    return raw, rows, records
+
+
+def _best(timings) -> float:
+    return min(timings) * 1000
+
+
+def run_benchmark(sizes=(1, 10, 100, 1000), repeat: int = 3) -> dict:
+    results = {}
+    for size in sizes:
+        raw, rows, records = _records(Config, size, seed=size)
+        timings = {"reload": [], "ingest": [], "refresh": []}
+        for attempt in range(repeat):
+            with tempfile.TemporaryDirectory() as directory:
+                dataset_path = os.path.join(directory, 'dataset.csv')
+                pd.concat([raw, rows]).to_csv(dataset_path, index=False)
+                reload_config = type('ReloadConfig', (Config,), {'DATASET_PATH': dataset_path})
+                start = time.perf_counter()
+                DataService(reload_config).to_serving_mode()
+                timings["reload"].append(time.perf_counter() - start)
+
+                segments = os.path.join(directory, 'segments')
+                writer = DataService(Config).to_serving_mode()
+                writer.attach_segment_store(SegmentStore(segments))
+                reader = DataService(Config).to_serving_mode()
+                reader.attach_segment_store(SegmentStore(segments))
+
+                start = time.perf_counter()
+                writer.ingest(records)
+                timings["ingest"].append(time.perf_counter() - start)
+                start = time.perf_counter()
+                reader.refresh_segments()
+                timings["refresh"].append(time.perf_counter() - start)
+
+        results[str(size)] = {
+            "reload_ms": _best(timings["reload"]),
+            "ingest_ms": _best(timings["ingest"]),
+            "refresh_ms": _best(timings["refresh"]),
+            "speedup": round(_best(timings["reload"]) / _best(timings["ingest"]), 1),
+        }
+    return {"base_records": len(pd.read_csv(Config.DATASET_PATH)), "batches": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, 10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per size (best is kept)')
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run_benchmark(args.sizes, args.repeat), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Benchmark the memory held by the data service in full and serving mode
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_memory [--repeat 3]
+
+Each mode is measured in a fresh interpreter: RSS is read after importing
+the dependencies and again after loading the datasets (and, for serving
+mode, switching to the compact structures), so the difference is the memory
+the data service keeps. Deep sizes per structure come from
+DataService.get_memory_usage.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+_MEASURE_SCRIPT = """
+import json, sys
+import numpy, pandas
+from config import Config
+from services.data_service import DataService
+from services.profiling_service import current_rss_bytes
+before = current_rss_bytes()
+service = DataService(Config)
+service.get_disease_descriptions()
+service.get_disease_precautions()
+service.get_symptom_weights()
+if sys.argv[1] == 'serving':
+    service.to_serving_mode()
+import gc; gc.collect()
+structures = service.get_memory_usage()
+print(json.dumps({"rss_bytes": current_rss_bytes() - before,
+                  "deep_bytes": sum(structures.values()), "structures": structures}))
+"""
+
+
+def _measure(mode: str, repeat: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-c', _MEASURE_SCRIPT, mode],
+            check=True, capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    best = min(runs, key=lambda run: run["rss_bytes"])
+    return {
+        "rss_added_bytes": best["rss_bytes"],
+        "deep_bytes": best["deep_bytes"],
+        "structures": {name: size for name, size in best["structures"].items() if size},
+    }
+
+
+def run_benchmark(repeat: int = 3) -> dict:
+    full = _measure('full', repeat)
+    serving = _measure('serving', repeat)
+    return {
+        "full": full,
+        "serving": serving,
+        "deep_reduction": round(full["deep_bytes"] / max(serving["deep_bytes"], 1), 2),
+        "rss_saved_bytes": full["rss_added_bytes"] - serving["rss_added_bytes"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per mode (best is kept)')
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run_benchmark(args.repeat), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""
+Benchmark oversubscribed against tuned threading for forked inference workers
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_threading [--seconds 10] [--batch-size 200]
+
+Forks worker processes the way gunicorn does and runs each in a closed
+loop over pre-encoded dataset rows, once with single rows and once with
+batches. The oversubscribed configuration runs two workers per CPU with
+n_jobs=4 and unlimited native pools; the tuned one uses the threading
+policy sized from the CPUs available to this container.
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+import numpy as np
+
+from benchmarks.common import benchmark_config, build_services, latency_stats, sample_requests
+from services.threading_policy import ThreadingPolicy, available_cpus, detect_cpu_quota
+
+OVERSUBSCRIBED_N_JOBS = 4
+
+
+def _worker(service, policy, apply_policy, inputs, n_jobs, seconds, barrier, results):
+    if apply_policy:
+        policy.apply()
+    model = service.model
+    service._predict(model, inputs[0], n_jobs)  # warm up
+    barrier.wait()
+
+    timings = []
+    deadline = time.perf_counter() + seconds
+    index = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        service._predict(model, inputs[index % len(inputs)], n_jobs)
+        timings.append(time.perf_counter() - start)
+        index += 1
+    results.put(timings)
+
+
+def _run(service, policy, apply_policy, inputs, n_jobs, rows_per_call, seconds) -> dict:
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(policy.workers)
+    results = context.Queue()
+    workers = [context.Process(target=_worker, args=(service, policy, apply_policy, inputs,
+                                                     n_jobs, seconds, barrier, results))
+               for _ in range(policy.workers)]
+    for worker in workers:
+        worker.start()
+    timings = [timing for _ in workers for timing in results.get()]
+    for worker in workers:
+        worker.join()
+
+    stats = latency_stats(timings)
+    stats["rows_per_second"] = len(timings) * rows_per_call / seconds
+    return stats
+
+
+def run_benchmark(seconds: float = 10.0, batch_size: int = 200) -> dict:
+    config = benchmark_config(compact=False)
+    _, prediction_service = build_services(config)
+    requests = sample_requests(config, 2000)
+    rows = np.vstack([prediction_service._prepare_input_vector(symptoms)
+                      for symptoms in requests])
+    singles = [rows[i:i + 1] for i in range(len(rows))]
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows) - batch_size + 1, batch_size)]
+
+    cpus = available_cpus()
+    tuned = ThreadingPolicy.from_config(config, cpus=cpus)
+    oversubscribed = ThreadingPolicy(cpus=cpus, workers=2 * cpus, web_threads=1,
+                                     native_threads=cpus, single_row_n_jobs=OVERSUBSCRIBED_N_JOBS,
+                                     batch_n_jobs=OVERSUBSCRIBED_N_JOBS)
+
+    results = {}
+    for name, policy, apply_policy in (('oversubscribed', oversubscribed, False),
+                                       ('tuned', tuned, True)):
+        results[name] = {
+            "policy": policy.describe(),
+            "single_row": _run(prediction_service, policy, apply_policy, singles,
+                               policy.single_row_n_jobs, 1, seconds),
+            "batch": _run(prediction_service, policy, apply_policy, batches,
+                          policy.batch_n_jobs, batch_size, seconds),
+        }
+
+    return {
+        "cpus": cpus,
+        "cpu_quota": detect_cpu_quota(),
+        "seconds": seconds,
+        "batch_size": batch_size,
+        "n_estimators": len(getattr(prediction_service.model, 'estimators_', [])),
+        "results": results,
+        "single_row_p99_speedup": (results["oversubscribed"]["single_row"]["p99_ms"]
+                                   / results["tuned"]["single_row"]["p99_ms"]),
+        "batch_throughput_ratio": (results["tuned"]["batch"]["rows_per_second"]
+                                   / results["oversubscribed"]["batch"]["rows_per_second"]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10.0,
+                        help='Duration of each closed-loop run')
+    parser.add_argument('--batch-size', type=int, default=200)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(run_benchmark(args.seconds, args.batch_size), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+Shared helpers for the backend benchmarks
+
+Run benchmarks from the backend directory, e.g.
+    python -m benchmarks.bench_audit
+"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from joblib import dump, load
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.exceptions import NotFittedError
+from sklearn.model_selection import train_test_split
+from sklearn.utils.validation import check_is_fitted
+from typing import Dict, List, Tuple
+import logging
+
+from config import Config
+from services.compact_forest import CompactForest
+from services.data_service import DataService
+from services.prediction_service import PredictionService
+
+logger = logging.getLogger(__name__)
+
+_FALLBACK_MODEL_PATH = os.path.join(tempfile.gettempdir(), 'ml-disease-benchmark-forest.joblib')
+
+
+def _is_fitted(path: str) -> bool:
+    if not os.path.exists(path):
+        return False
+    try:
+        check_is_fitted(load(path))
+        return True
+    except NotFittedError:
+        return False
+
+
+def fitted_model_path(config=Config, data_service: DataService = None) -> str:
+    """
+    Return a path to a fitted forest
+
+    Uses ``config.MODEL_PATH`` when it holds a fitted model; otherwise fits
+    the notebook's forest (500 trees, max_depth=13) once and caches it in the
+    temp directory so benchmarks have a realistic model to measure.
+    """
+    if _is_fitted(config.MODEL_PATH):
+        return config.MODEL_PATH
+    if _is_fitted(_FALLBACK_MODEL_PATH):
+        return _FALLBACK_MODEL_PATH
+
+    logger.warning(f"{config.MODEL_PATH} is missing or unfitted; "
+                   f"fitting the notebook forest into {_FALLBACK_MODEL_PATH}")
+    data_service = data_service or DataService(config)
+    features, labels = data_service.get_training_data()
+    x_train, _, y_train, _ = train_test_split(features, labels, train_size=0.8, random_state=42)
+    model = RandomForestClassifier(random_state=42, max_features='sqrt',
+                                   n_estimators=500, max_depth=13)
+    model.fit(x_train, y_train)
+    dump(model, _FALLBACK_MODEL_PATH)
+    return _FALLBACK_MODEL_PATH
+
+
+def compact_model_path(config=Config) -> str:
+    """Path to a compact conversion of the fitted forest, created on demand"""
+    source = fitted_model_path(config)
+    path = os.path.splitext(_FALLBACK_MODEL_PATH)[0] + '.compact.npz'
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(source):
+        CompactForest.from_estimator(load(source)).save(path)
+    return path
+
+
+def benchmark_config(base=Config, compact: bool = False, **overrides):
+    """
+    Config subclass pointing at a fitted model, with attribute overrides
+
+    Args:
+        compact: Serve the compact quantized forest instead of the joblib model
+    """
+    attributes = {'MODEL_PATH': fitted_model_path(base), 'MODEL_TIER': None,
+                  'MODEL_FORMAT': 'joblib'}
+    if compact:
+        attributes.update(MODEL_FORMAT='compact', COMPACT_MODEL_PATH=compact_model_path(base))
+    attributes.update(overrides)
+    return type('BenchmarkConfig', (base,), attributes)
+
+
+def build_services(config=None, audit_logger=None) -> Tuple[DataService, PredictionService]:
+    """Create the data and prediction services the API would use"""
+    config = config or benchmark_config()
+    data_service = DataService(config)
+    return data_service, PredictionService(config, data_service, audit_logger)
+
+
+def sample_requests(config=Config, count: int = 1000, seed: int = 0) -> List[List[str]]:
+    """Symptom lists taken from random dataset rows"""
+    raw = pd.read_csv(config.DATASET_PATH)
+    rows = raw.drop(columns=['Disease']).values
+    rng = np.random.RandomState(seed)
+    requests = []
+    for index in rng.randint(0, len(rows), size=count):
+        requests.append([str(value).strip() for value in rows[index] if pd.notna(value)])
+    return requests
+
+
+def latency_stats(seconds) -> Dict[str, float]:
+    """Summary of a list of latencies in seconds, reported in milliseconds"""
+    ms = np.asarray(seconds) * 1000
+    return {
+        "count": int(ms.size),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
@@ -10,18 +10,105 @@ class Config:
     
     # Model paths
     MODEL_PATH = './model/random_forest.joblib'
+    COMPACT_MODEL_PATH = './model/random_forest.compact.npz'
+    # Pruned/distilled variants written by tools.prune_model, selected by name
+    MODEL_TIERS_DIR = './model/tiers'
+    MODEL_TIER = os.environ.get('MODEL_TIER')
+    # 'joblib' loads the pickled sklearn model, 'compact' the quantized forest
+    MODEL_FORMAT = os.environ.get('MODEL_FORMAT') or ('compact' if MODEL_TIER else 'joblib')
     DATASET_PATH = './datasets/dataset.csv'
     SYMPTOM_SEVERITY_PATH = './datasets/Symptom-severity.csv'
     DESCRIPTION_PATH = './datasets/symptom_Description.csv'
     PRECAUTION_PATH = './datasets/symptom_precaution.csv'
     
+    # Precompute node distributions at load for per-prediction explanations
+    # (costs memory and load time in every worker, so off unless requested)
+    EXPLANATIONS_ENABLED = os.environ.get('EXPLANATIONS_ENABLED', '').lower() in ('1', 'true', 'yes')
+    
+    # Ensemble serving: models evaluated together on the same encoded input, e.g.
+    # [{'name': 'forest', 'path': './model/random_forest.joblib', 'budget_ms': 50},
+    #  {'name': 'svm', 'path': './model/model.sav', 'budget_ms': 20}]
+    ENSEMBLE_MODELS = []
+    # 'vote' for majority voting, 'proba' for probability averaging
+    ENSEMBLE_METHOD = 'vote'
+    ENSEMBLE_DEFAULT_BUDGET_MS = 100.0
+    ENSEMBLE_MAX_WORKERS = None
+    
+    # Extra model versions served next to MODEL_PATH, loaded on first use, e.g.
+    # [{'name': 'canary', 'path': './model/random_forest_v2.joblib', 'percent': 10}]
+    MODEL_VERSIONS = []
+    # Requests pick a version with this header, otherwise the routing key
+    # (or the symptom set) is hashed into the configured percentages
+    MODEL_VERSION_HEADER = 'X-Model-Version'
+    MODEL_ROUTING_KEY_HEADER = 'X-Routing-Key'
+    MODEL_STORE_MAX_LOADED = 2
+    MODEL_STORE_MEMORY_BUDGET_MB = None
+    
+    # Input drift monitoring against the training dataset; GET /drift shows
+    # sampled requests and unknown symptoms only with X-Admin-Token
+    DRIFT_ENABLED = os.environ.get('DRIFT_ENABLED', '').lower() in ('1', 'true', 'yes')
+    DRIFT_THRESHOLD = 0.1
+    DRIFT_CHECK_INTERVAL = 60.0
+    # Distributions are not scored until a worker has seen this many requests
+    DRIFT_MIN_REQUESTS = 100
+    DRIFT_RESERVOIR_SIZE = 256
+    
+    # Admin profiling endpoints, registered only when enabled and ADMIN_TOKEN is set
+    PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+    ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+    PROFILING_MAX_SECONDS = 60
+    PROFILING_SAMPLE_INTERVAL = 0.005
+    PROFILING_OUTPUT_DIR = './profiles'
+    
+    # Append-only store of ingested records, applied on top of DATASET_PATH,
+    # e.g. ./datasets/segments; unset disables the store and its background threads
+    DATASET_SEGMENTS_DIR = os.environ.get('DATASET_SEGMENTS_DIR')
+    # POST /ingest, registered only when enabled, the store is set and ADMIN_TOKEN is set
+    INGEST_ENABLED = os.environ.get('INGEST_ENABLED', '').lower() in ('1', 'true', 'yes')
+    INGEST_MAX_RECORDS = 10000
+    # Seconds between checks for new segments and between compactions (0 disables)
+    SEGMENT_REFRESH_INTERVAL = 5.0
+    SEGMENT_COMPACT_INTERVAL = 300.0
+    SEGMENT_COMPACT_MIN = 8
+    
+    # Keep only compact lookup structures after loading the datasets
+    DATA_SERVING_MODE = os.environ.get('DATA_SERVING_MODE', 'true').lower() in ('1', 'true', 'yes')
+    # GET /debug/memory, registered only when enabled and ADMIN_TOKEN is set
+    MEMORY_DEBUG_ENABLED = os.environ.get('MEMORY_DEBUG_ENABLED', '').lower() in ('1', 'true', 'yes')
+    
+    # Threading policy; 0 sizes the value from the CPUs available to the
+    # container (affinity mask capped by the cgroup CPU quota)
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS', 0))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', 0))
+    # BLAS/OpenMP threads per worker, pinned with threadpoolctl
+    NATIVE_THREADS = int(os.environ.get('NATIVE_THREADS', 0))
+    # joblib n_jobs inside model.predict for /predict and /predict/batch
+    SINGLE_ROW_N_JOBS = int(os.environ.get('SINGLE_ROW_N_JOBS', 1))
+    BATCH_N_JOBS = int(os.environ.get('BATCH_N_JOBS', 0))
+    THREADING_POLICY_ENABLED = os.environ.get('THREADING_POLICY_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    # GET /debug/threads, registered only when enabled and ADMIN_TOKEN is set
+    THREADS_DEBUG_ENABLED = os.environ.get('THREADS_DEBUG_ENABLED', '').lower() in ('1', 'true', 'yes')
+    
     # API settings
     MAX_SYMPTOMS = 17
     MIN_SYMPTOMS = 1
+    MAX_BATCH_SIZE = 1000
+    
+    # Prediction audit log (batched background writes to SQLite)
+    AUDIT_ENABLED = os.environ.get('AUDIT_ENABLED', '').lower() in ('1', 'true', 'yes')
+    AUDIT_DB_PATH = os.environ.get('AUDIT_DB_PATH') or './audit/predictions.db'
+    AUDIT_QUEUE_SIZE = 10000
+    AUDIT_BATCH_SIZE = 256
+    AUDIT_FLUSH_INTERVAL = 1.0
+    # 'drop' discards records when the queue is full, 'block' waits up to AUDIT_BLOCK_TIMEOUT
+    AUDIT_FULL_POLICY = os.environ.get('AUDIT_FULL_POLICY') or 'drop'
+    AUDIT_BLOCK_TIMEOUT = 0.05
 
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
+    MEMORY_DEBUG_ENABLED = True
+    THREADS_DEBUG_ENABLED = True
 
 class ProductionConfig(Config):
     """Production configuration"""
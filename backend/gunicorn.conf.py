@@ -0,0 +1,18 @@
+"""
+Gunicorn settings sized by the threading policy in config.py
+
+Workers and threads default to the CPUs available to the container; set
+WEB_WORKERS, WEB_THREADS and NATIVE_THREADS to override. Each worker pins
+its native thread pools when create_app() runs in it. The Procfile serves
+the production config, so the policy is sized from it too.
+"""
+import os
+from config import config
+from services.threading_policy import ThreadingPolicy
+
+_policy = ThreadingPolicy.from_config(config['production'])
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = _policy.workers
+threads = _policy.web_threads
+worker_class = 'gthread' if threads > 1 else 'sync'
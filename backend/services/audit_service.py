@@ -0,0 +1,182 @@
+"""
+Audit service for recording every prediction without blocking requests
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+FULL_POLICIES = ('drop', 'block')
+
+_STOP = object()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    symptoms TEXT NOT NULL,
+    disease TEXT,
+    model_version TEXT,
+    latency_ms REAL
+)
+"""
+
+
+class AuditLogger:
+    """Queue prediction records in memory and write them in batches
+
+    ``record`` only puts a tuple on a bounded queue; a daemon thread drains
+    the queue and appends batches to a SQLite database in WAL mode. When the
+    queue is full, the 'drop' policy discards the record and the 'block'
+    policy waits up to ``block_timeout`` seconds before discarding it.
+    """
+
+    def __init__(self, db_path: str, queue_size: int = 10000, batch_size: int = 256,
+                 flush_interval: float = 1.0, full_policy: str = 'drop',
+                 block_timeout: float = 0.05):
+        if full_policy not in FULL_POLICIES:
+            raise ValueError(f"full_policy must be one of {FULL_POLICIES}")
+
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.full_policy = full_policy
+        self.block_timeout = block_timeout
+        self.written = 0
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._ready = threading.Event()
+        self._error = None
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    @classmethod
+    def from_config(cls, config) -> 'AuditLogger':
+        """Create an audit logger from the AUDIT_* configuration settings"""
+        return cls(
+            db_path=config.AUDIT_DB_PATH,
+            queue_size=config.AUDIT_QUEUE_SIZE,
+            batch_size=config.AUDIT_BATCH_SIZE,
+            flush_interval=config.AUDIT_FLUSH_INTERVAL,
+            full_policy=config.AUDIT_FULL_POLICY,
+            block_timeout=config.AUDIT_BLOCK_TIMEOUT,
+        )
+
+    def record(self, symptoms: List[str], disease: str, model_version: str,
+               latency_ms: float) -> bool:
+        """
+        Queue one prediction record
+
+        Returns:
+            True if the record was queued, False if it was dropped
+        """
+        entry = (time.time(), list(symptoms), disease, model_version, latency_ms)
+        try:
+            if self.full_policy == 'block':
+                self._queue.put(entry, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(entry)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until every queued record has been written"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                return False
+            time.sleep(0.005)
+        return True
+
+    def close(self, timeout: float = 5.0):
+        """Write any remaining records and stop the writer thread"""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counters for monitoring the audit pipeline"""
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(_SCHEMA)
+        connection.commit()
+        return connection
+
+    def _write(self, connection: sqlite3.Connection, batch: list):
+        rows = [(created_at, json.dumps(symptoms), None if disease is None else str(disease),
+                 model_version, latency_ms)
+                for created_at, symptoms, disease, model_version, latency_ms in batch]
+        try:
+            connection.executemany(
+                "INSERT INTO predictions (created_at, symptoms, disease, model_version, latency_ms) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+            connection.commit()
+            self.written += len(rows)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing audit batch of {len(rows)} records: {str(e)}")
+
+    def _run(self):
+        """Writer loop: block for the first record, then drain up to a batch"""
+        try:
+            connection = self._connect()
+        except Exception as e:
+            logger.error(f"Error opening audit database: {str(e)}")
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+
+            batch = []
+            taken = 1
+            item = first
+            while True:
+                if item is _STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                    taken += 1
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(connection, batch)
+            for _ in range(taken):
+                self._queue.task_done()
+
+        connection.close()
@@ -0,0 +1,308 @@
+"""
+Compact, quantized storage format for tree ensembles
+
+Symptom weights are small integers (0-7) and the forest has a few dozen
+classes, so split features and thresholds fit in a byte, child links fit in
+int16 and leaf distributions can be kept as uint8 quantized probabilities or
+as plain argmax labels. The compact file is a compressed ``.npz`` archive
+loaded without pickle.
+"""
+import numpy as np
+from typing import Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+LEAF_MODES = ('proba', 'label')
+PROBA_SCALE = 255
+
+_LEAF = -1
+
+
+def _narrow_int(max_value: int, signed: bool = True):
+    """Return the narrowest integer dtype that can hold ``max_value``"""
+    candidates = (np.int8, np.int16, np.int32, np.int64) if signed else \
+        (np.uint8, np.uint16, np.uint32, np.uint64)
+    for dtype in candidates:
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    raise ValueError(f"Value {max_value} does not fit in a 64-bit integer")
+
+
+def _tree_arrays(tree, max_depth: Optional[int] = None) -> Tuple[np.ndarray, ...]:
+    """
+    Return (children_left, children_right, feature, threshold, value) of a tree,
+    optionally truncated so that nodes at ``max_depth`` become leaves
+    """
+    left, right = tree.children_left, tree.children_right
+    feature, threshold, value = tree.feature, tree.threshold, tree.value[:, 0, :]
+    if max_depth is None or tree.max_depth <= max_depth:
+        return left, right, feature, threshold, value
+
+    # Depth-first walk keeping the root first and everything up to max_depth
+    keep = []
+    stack = [(0, 0)]
+    while stack:
+        node, depth = stack.pop()
+        keep.append(node)
+        if left[node] != _LEAF and depth < max_depth:
+            stack.append((right[node], depth + 1))
+            stack.append((left[node], depth + 1))
+    keep = np.array(keep)
+
+    # Children that were cut off map to -1, turning their parent into a leaf
+    remap = np.full(tree.node_count, _LEAF, dtype=np.int64)
+    remap[keep] = np.arange(len(keep))
+    new_left = np.where(left[keep] == _LEAF, _LEAF, remap[left[keep]])
+    new_right = np.where(new_left == _LEAF, _LEAF, remap[right[keep]])
+    return new_left, new_right, feature[keep], threshold[keep], value[keep]
+
+
+def _get_trees(model) -> list:
+    """Return the fitted sklearn trees of a forest or a single decision tree"""
+    if hasattr(model, 'estimators_'):
+        return [estimator.tree_ for estimator in model.estimators_]
+    if hasattr(model, 'tree_'):
+        return [model.tree_]
+    raise ValueError("Model must be a fitted tree or forest classifier")
+
+
+class CompactForest:
+    """Flat, narrow-dtype representation of a fitted tree ensemble
+
+    All trees are stored back to back. ``children_left``/``children_right``
+    hold tree-local node indices (``-1`` marks a leaf) and ``tree_offsets``
+    gives the position of each tree's root in the flat arrays. Leaf values
+    are stored for leaves only, in node order.
+    """
+
+    def __init__(self, classes, n_features: int, max_depth: int, tree_offsets,
+                 feature, threshold, children_left, children_right,
+                 leaf_values, leaf_mode: str = 'proba'):
+        if leaf_mode not in LEAF_MODES:
+            raise ValueError(f"leaf_mode must be one of {LEAF_MODES}")
+
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = int(n_features)
+        self.max_depth = int(max_depth)
+        self.tree_offsets = tree_offsets
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        self.leaf_values = leaf_values
+        self.leaf_mode = leaf_mode
+
+        # Map each node to its row in leaf_values (-1 for internal nodes)
+        is_leaf = children_left == _LEAF
+        self._leaf_index = np.where(is_leaf, np.cumsum(is_leaf) - 1, -1).astype(
+            _narrow_int(max(len(leaf_values), 1)))
+
+    @property
+    def n_estimators(self) -> int:
+        return len(self.tree_offsets)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.children_left)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size in bytes of the arrays backing the forest"""
+        arrays = (self.classes_, self.tree_offsets, self.feature, self.threshold,
+                  self.children_left, self.children_right, self.leaf_values,
+                  self._leaf_index)
+        return int(sum(array.nbytes for array in arrays))
+
+    @classmethod
+    def from_estimator(cls, model, leaf_mode: str = 'proba',
+                       n_estimators: Optional[int] = None,
+                       max_depth: Optional[int] = None) -> 'CompactForest':
+        """
+        Build a compact forest from a fitted sklearn classifier
+
+        Args:
+            model: Fitted RandomForestClassifier, ExtraTreesClassifier or
+                DecisionTreeClassifier trained on integer features
+            leaf_mode: 'proba' keeps uint8 quantized class distributions
+                (soft voting, as sklearn does); 'label' keeps only the
+                argmax class of each leaf (hard voting)
+            n_estimators: Keep only the first ``n_estimators`` trees
+            max_depth: Truncate trees so nodes at this depth become leaves
+                predicting their training class distribution
+
+        Returns:
+            CompactForest equivalent to ``model`` on integer inputs (unless
+            pruned with ``n_estimators`` or ``max_depth``)
+        """
+        if leaf_mode not in LEAF_MODES:
+            raise ValueError(f"leaf_mode must be one of {LEAF_MODES}")
+
+        trees = _get_trees(model)[:n_estimators]
+        if not trees:
+            raise ValueError("n_estimators must keep at least one tree")
+        classes = np.asarray(model.classes_)
+        if classes.ndim != 1 or trees[0].value.shape[1] != 1:
+            raise ValueError("Only single-output classifiers are supported")
+        if classes.dtype == object:
+            classes = classes.astype(str)
+
+        n_features = int(model.n_features_in_)
+        parts = [_tree_arrays(tree, max_depth) for tree in trees]
+        node_counts = [len(part[0]) for part in parts]
+        offsets = np.concatenate(([0], np.cumsum(node_counts)[:-1])).astype(
+            _narrow_int(sum(node_counts)))
+        child_dtype = _narrow_int(max(node_counts))
+
+        left, right, feature, threshold, values = (
+            np.concatenate(arrays) for arrays in zip(*parts))
+        is_leaf = left == _LEAF
+
+        # Features are integers, so ``x <= t`` is the same as ``x <= floor(t)``
+        split_thresholds = np.floor(threshold[~is_leaf])
+        if split_thresholds.size and (split_thresholds.min() < 0 or
+                                      split_thresholds.max() > np.iinfo(np.uint8).max):
+            raise ValueError("Split thresholds do not fit in uint8; "
+                             "the model was not trained on symptom weights")
+        feature_dtype = _narrow_int(max(n_features - 1, 0), signed=False)
+
+        depth = max(int(tree.max_depth) for tree in trees)
+        if max_depth is not None:
+            depth = min(depth, max_depth)
+
+        values = values[is_leaf]
+        totals = values.sum(axis=1, keepdims=True)
+        proba = values / np.where(totals == 0, 1, totals)
+        if leaf_mode == 'proba':
+            leaf_values = np.rint(proba * PROBA_SCALE).astype(np.uint8)
+        else:
+            leaf_values = proba.argmax(axis=1).astype(
+                _narrow_int(max(len(classes) - 1, 0), signed=False))
+
+        return cls(
+            classes=classes,
+            n_features=n_features,
+            max_depth=depth,
+            tree_offsets=offsets,
+            feature=np.where(is_leaf, 0, feature).astype(feature_dtype),
+            threshold=np.where(is_leaf, 0, np.floor(threshold)).astype(np.uint8),
+            children_left=left.astype(child_dtype),
+            children_right=right.astype(child_dtype),
+            leaf_values=leaf_values,
+            leaf_mode=leaf_mode,
+        )
+
+    def save(self, path: str):
+        """Write the forest to ``path`` as a compressed npz archive"""
+        with open(path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                format_version=np.array(FORMAT_VERSION),
+                leaf_mode=np.array(self.leaf_mode),
+                classes=self.classes_,
+                n_features=np.array(self.n_features_in_),
+                max_depth=np.array(self.max_depth),
+                tree_offsets=self.tree_offsets,
+                feature=self.feature,
+                threshold=self.threshold,
+                children_left=self.children_left,
+                children_right=self.children_right,
+                leaf_values=self.leaf_values,
+            )
+        logger.info(f"Saved compact forest to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> 'CompactForest':
+        """Load a forest written by :meth:`save`"""
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['format_version'])
+            if version != FORMAT_VERSION:
+                raise ValueError(f"Unsupported compact forest format version {version}")
+            return cls(
+                classes=data['classes'],
+                n_features=int(data['n_features']),
+                max_depth=int(data['max_depth']),
+                tree_offsets=data['tree_offsets'],
+                feature=data['feature'],
+                threshold=data['threshold'],
+                children_left=data['children_left'],
+                children_right=data['children_right'],
+                leaf_values=data['leaf_values'],
+                leaf_mode=str(data['leaf_mode']),
+            )
+
+    def _check_input(self, X) -> np.ndarray:
+        """Validate the input matrix; the uint8 thresholds require integers"""
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Expected input of shape (n_samples, {self.n_features_in_})")
+        if X.dtype.kind not in 'iu':
+            X_int = X.astype(np.int64)
+            if not np.array_equal(X_int, X):
+                raise ValueError("CompactForest only supports integer feature values")
+            X = X_int
+        return X
+
+    def apply(self, X) -> np.ndarray:
+        """Return the flat leaf node index reached in every tree for every row"""
+        X = self._check_input(X)
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.tree_offsets.astype(np.int64),
+                                (X.shape[0], self.n_estimators)).copy()
+
+        # Advance every (row, tree) pair one level per step, all at once
+        for _ in range(self.max_depth):
+            left = self.children_left[nodes]
+            active = left != _LEAF
+            if not active.any():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            child = np.where(go_left, left, self.children_right[nodes])
+            nodes = np.where(active, child + self.tree_offsets, nodes)
+        return nodes
+
+    def _votes(self, X) -> np.ndarray:
+        """Accumulated (unnormalised) class votes per row"""
+        leaves = self._leaf_index[self.apply(X)]
+        if self.leaf_mode == 'proba':
+            return self.leaf_values[leaves].sum(axis=1, dtype=np.int64)
+
+        labels = self.leaf_values[leaves]
+        votes = np.zeros((labels.shape[0], len(self.classes_)), dtype=np.int64)
+        np.add.at(votes, (np.arange(labels.shape[0])[:, None], labels), 1)
+        return votes
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Approximate class probabilities (quantized in 'proba' mode)"""
+        votes = self._votes(X)
+        return votes / votes.sum(axis=1, keepdims=True)
+
+    def predict(self, X) -> np.ndarray:
+        """Predict class labels for ``X``"""
+        return self.classes_[self._votes(X).argmax(axis=1)]
+
+
+def validate_equivalence(model, compact: CompactForest, X) -> Dict[str, float]:
+    """
+    Compare predictions of the original model and its compact form
+
+    Returns:
+        Dictionary with the number of rows, mismatches and agreement ratio
+    """
+    expected = np.asarray(model.predict(X)).astype(str)
+    actual = compact.predict(X).astype(str)
+    mismatches = int((expected != actual).sum())
+    return {
+        "rows": len(expected),
+        "mismatches": mismatches,
+        "agreement": 1.0 - mismatches / max(len(expected), 1),
+    }
+
+
+def dtype_summary(compact: CompactForest) -> Dict[str, Tuple[str, int]]:
+    """Dtype and byte size of each array in a compact forest"""
+    names = ('tree_offsets', 'feature', 'threshold', 'children_left',
+             'children_right', 'leaf_values')
+    return {name: (str(getattr(compact, name).dtype), int(getattr(compact, name).nbytes))
+            for name in names}
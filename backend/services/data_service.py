@@ -1,13 +1,19 @@
 """
 Data service for loading and preprocessing medical datasets
 """
+import gc
+import sys
+import threading
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import Any, List, Dict, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Misspelled symptom names in dataset.csv that have no severity weight
+UNWEIGHTED_SYMPTOMS = ('dischromic _patches', 'spotting_ urination', 'foul_smell_of urine')
+
 class DataService:
     """Service class for handling medical data operations"""
     
@@ -18,6 +24,23 @@ class DataService:
         self.descriptions = None
         self.precaution = None
         self.symptoms_list = None
+        self.serving_mode = False
+        
+        # Compact structures, built on first use or by to_serving_mode()
+        self.disease_labels = None
+        self.label_codes = None
+        self.features = None
+        self.weight_table = None
+        self._symptom_weights = None
+        self._description_map = None
+        self._precaution_map = None
+        
+        # Records ingested after DATASET_PATH, see attach_segment_store()
+        self.segment_store = None
+        self.segment_sequence = 0
+        self._segment_lock = threading.Lock()
+        self._refresh_stop = threading.Event()
+        self._refresh_thread = None
         self._load_data()
     
     def _load_data(self):
@@ -67,9 +90,8 @@ class DataService:
             d = pd.DataFrame(vals, columns=cols)
             
             # Handle special cases
-            d = d.replace('dischromic _patches', 0)
-            d = d.replace('spotting_ urination', 0)
-            d = d.replace('foul_smell_of urine', 0)
+            for symptom in UNWEIGHTED_SYMPTOMS:
+                d = d.replace(symptom, 0)
             
             self.df = d
             
@@ -83,12 +105,184 @@ class DataService:
         """Get list of all available symptoms"""
         return self.symptoms_list
     
+    def to_serving_mode(self) -> 'DataService':
+        """
+        Replace the pandas frames with the compact structures serving needs
+        
+        Disease labels become interned strings plus uint8 codes per record,
+        the encoded dataset a uint8 matrix, symptom weights an int8 table and
+        the lookup maps plain dicts of tuples. The DataFrames are released.
+        
+        Returns:
+            self, for chaining
+        """
+        if self.serving_mode:
+            return self
+        
+        features, labels = self.get_training_data()
+        codes, uniques = pd.factorize(labels)
+        self.disease_labels = tuple(sys.intern(str(label)) for label in uniques)
+        self.label_codes = codes.astype(np.uint8 if len(uniques) <= 256 else np.uint16)
+        self.features = features.astype(np.uint8)
+        
+        weights = self.get_symptom_weights()
+        self.symptoms_list = tuple(sys.intern(symptom) for symptom in self.symptoms_list)
+        self.weight_table = np.array([weights.get(symptom, 0) for symptom in self.symptoms_list],
+                                     dtype=np.int8)
+        self._symptom_weights = {sys.intern(symptom): int(weight)
+                                 for symptom, weight in weights.items()}
+        self._description_map = {sys.intern(disease): description
+                                 for disease, description in self.get_disease_descriptions().items()}
+        self._precaution_map = {sys.intern(disease): tuple(precautions)
+                                for disease, precautions in self.get_disease_precautions().items()}
+        
+        self.df = None
+        self.symptom_severity = None
+        self.descriptions = None
+        self.precaution = None
+        self.serving_mode = True
+        gc.collect()
+        
+        logger.info("Data service switched to serving mode")
+        return self
+    
+    def get_training_data(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Get the encoded symptom weight matrix and disease labels"""
+        if self.serving_mode:
+            labels = np.array(self.disease_labels)[self.label_codes]
+            return self.features.astype(np.int64), labels
+        features = self.df.iloc[:, 1:].values.astype(np.int64)
+        labels = self.df['Disease'].values.astype(str)
+        return features, labels
+    
+    def get_diseases(self) -> List[str]:
+        """Get the diseases in the dataset, in order of first appearance"""
+        if self.serving_mode:
+            return list(self.disease_labels)
+        return self.df['Disease'].unique().tolist()
+    
+    def get_record_count(self) -> int:
+        """Get the number of records, including ingested ones"""
+        return len(self.label_codes) if self.serving_mode else len(self.df)
+    
+    def _symptom_column_count(self) -> int:
+        return self.features.shape[1] if self.serving_mode else len(self.df.columns) - 1
+    
+    def encode_records(self, records: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Encode raw records like the dataset rows; see encode_records()"""
+        return encode_records(records, self.get_symptom_weights(), self._symptom_column_count())
+    
+    def attach_segment_store(self, segment_store) -> int:
+        """
+        Apply the records already ingested into ``segment_store`` and follow it
+        
+        Returns:
+            Number of ingested records applied
+        """
+        self.segment_store = segment_store
+        return self.refresh_segments()
+    
+    def refresh_segments(self) -> int:
+        """
+        Apply segments appended since the last refresh
+        
+        Only the new rows are read; they arrive already encoded.
+        
+        Returns:
+            Number of new records
+        """
+        if self.segment_store is None:
+            return 0
+        with self._segment_lock:
+            features, labels, sequence = self.segment_store.read_since(self.segment_sequence)
+            if len(labels):
+                self._append_encoded(features, labels)
+            self.segment_sequence = sequence
+        if len(labels):
+            logger.info(f"Applied {len(labels)} ingested records up to segment {sequence}")
+        return len(labels)
+    
+    def _append_encoded(self, features: np.ndarray, labels: np.ndarray):
+        """Extend the dataset and the structures derived from it with new rows"""
+        labels = [str(label).strip() for label in labels]
+        if not self.serving_mode:
+            columns = self.df.columns
+            rows = pd.DataFrame(features.astype(np.int64), columns=columns[1:])
+            rows.insert(0, columns[0], labels)
+            self.df = pd.concat([self.df, rows], ignore_index=True)
+            return
+        
+        index = {label: code for code, label in enumerate(self.disease_labels)}
+        added = tuple(sys.intern(label) for label in dict.fromkeys(labels) if label not in index)
+        disease_labels = self.disease_labels + added
+        index.update((label, len(self.disease_labels) + i) for i, label in enumerate(added))
+        codes = np.fromiter((index[label] for label in labels), dtype=np.int64, count=len(labels))
+        
+        self.disease_labels = disease_labels
+        self.label_codes = np.concatenate([self.label_codes, codes]).astype(
+            np.uint8 if len(disease_labels) <= 256 else np.uint16)
+        self.features = np.vstack([self.features, features.astype(np.uint8)])
+    
+    def ingest(self, records: List[Dict]) -> Dict[str, int]:
+        """
+        Append new records to the segment store and apply them here
+        
+        Args:
+            records: List of {'disease', 'symptoms'} dictionaries
+            
+        Returns:
+            Dictionary with the new segment number and record counts
+        """
+        if self.segment_store is None:
+            raise RuntimeError("No segment store is attached")
+        features, labels, symptoms = self.encode_records(records)
+        segment = self.segment_store.append(features, labels, symptoms)
+        self.refresh_segments()
+        return {
+            "segment": segment,
+            "ingested": len(labels),
+            "records": self.get_record_count(),
+        }
+    
+    def start_segment_refresh(self, interval: float):
+        """Check the segment store for new records every ``interval`` seconds"""
+        if self._refresh_thread is not None:
+            return
+        self._refresh_thread = threading.Thread(target=self._run_segment_refresh,
+                                                args=(interval,), name='segment-refresh',
+                                                daemon=True)
+        self._refresh_thread.start()
+    
+    def stop_segment_refresh(self):
+        self._refresh_stop.set()
+    
+    def _run_segment_refresh(self, interval: float):
+        while not self._refresh_stop.wait(interval):
+            try:
+                self.refresh_segments()
+            except Exception as e:
+                logger.error(f"Error applying ingested segments: {str(e)}")
+    
+    def get_symptom_weights(self) -> Dict[str, int]:
+        """Get symptom name to severity weight mapping"""
+        if self._symptom_weights is None:
+            self._symptom_weights = dict(zip(
+                self.symptom_severity['Symptom'],
+                self.symptom_severity['weight']
+            ))
+        return self._symptom_weights
+    
     def get_disease_descriptions(self) -> Dict[str, str]:
         """Get disease descriptions mapping"""
-        return dict(zip(self.descriptions['Disease'], self.descriptions['Description']))
+        if self._description_map is None:
+            self._description_map = dict(zip(self.descriptions['Disease'],
+                                              self.descriptions['Description']))
+        return self._description_map
     
     def get_disease_precautions(self) -> Dict[str, List[str]]:
         """Get disease precautions mapping"""
+        if self._precaution_map is not None:
+            return self._precaution_map
         precautions_dict = {}
         for _, row in self.precaution.iterrows():
             disease = row['Disease']
@@ -97,4 +291,83 @@ class DataService:
                 if pd.notna(row[col]):
                     precautions.append(row[col])
             precautions_dict[disease] = precautions
+        self._precaution_map = precautions_dict
         return precautions_dict
+    
+    def get_memory_usage(self) -> Dict[str, int]:
+        """Get the deep size in bytes of every structure held by the service"""
+        names = ('df', 'symptom_severity', 'descriptions', 'precaution', 'symptoms_list',
+                 'disease_labels', 'label_codes', 'features', 'weight_table',
+                 '_symptom_weights', '_description_map', '_precaution_map')
+        return {name.lstrip('_'): deep_sizeof(getattr(self, name)) for name in names}
+
+
+def encode_records(records: List[Dict], symptom_weights: Dict[str, int],
+                   n_columns: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Encode raw records the way the dataset rows are preprocessed
+    
+    Args:
+        records: List of {'disease', 'symptoms'} dictionaries
+        symptom_weights: Symptom name to severity weight mapping
+        n_columns: Number of symptom columns
+        
+    Returns:
+        Tuple of the uint8 weight matrix, the disease labels and the symptom
+        names padded with empty strings
+        
+    Raises:
+        ValueError: If a record is malformed or uses an unknown symptom
+    """
+    if not records:
+        raise ValueError("At least one record is required")
+    
+    features = np.zeros((len(records), n_columns), dtype=np.uint8)
+    names = np.full((len(records), n_columns), '', dtype=object)
+    labels = []
+    for row, record in enumerate(records):
+        disease = record.get('disease') if isinstance(record, dict) else None
+        symptoms = record.get('symptoms') if isinstance(record, dict) else None
+        if not isinstance(disease, str) or not disease.strip():
+            raise ValueError(f"Record {row}: 'disease' must be a non-empty string")
+        if not isinstance(symptoms, list) or not 1 <= len(symptoms) <= n_columns:
+            raise ValueError(f"Record {row}: 'symptoms' must be a list of 1 to {n_columns} names")
+        for column, symptom in enumerate(symptoms):
+            if not isinstance(symptom, str):
+                raise ValueError(f"Record {row}: symptoms must be strings, got {symptom!r}")
+            symptom = symptom.strip()
+            if symptom in UNWEIGHTED_SYMPTOMS:
+                weight = 0
+            elif symptom in symptom_weights:
+                weight = symptom_weights[symptom]
+            else:
+                raise ValueError(f"Record {row}: unknown symptom {symptom!r}")
+            features[row, column] = weight
+            names[row, column] = symptom
+        labels.append(disease.strip())
+    return features, np.array(labels), names.astype(str)
+
+
+def deep_sizeof(obj: Any, seen: set = None) -> int:
+    """Approximate deep size in bytes of pandas, NumPy and container objects"""
+    if obj is None:
+        return 0
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(obj, np.ndarray):
+        size = sys.getsizeof(obj)
+        if obj.dtype == object:
+            size += sum(deep_sizeof(item, seen) for item in obj.ravel())
+        return size
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, seen) + deep_sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
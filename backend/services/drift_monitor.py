@@ -0,0 +1,282 @@
+"""
+Streaming drift monitor comparing live /predict traffic with the training data
+
+Every request updates fixed-size sketches in O(1): counts over the known
+symptom vocabulary, a count-min sketch with a short list of the most frequent
+unknown symptoms, a uniform reservoir sample over all requests seen and a
+histogram of predicted diseases. Memory use does not grow with traffic.
+"""
+import hashlib
+import random
+import threading
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+_EPSILON = 1e-9
+# Report keys holding what callers sent verbatim, shown to admins only
+REQUEST_CONTENT_KEYS = ('sample', 'top_unknown_symptoms')
+
+
+def jensen_shannon(p: np.ndarray, q: np.ndarray) -> float:
+    """Jensen-Shannon divergence (base 2, between 0 and 1) of two count vectors"""
+    p = np.asarray(p, dtype=np.float64) + _EPSILON
+    q = np.asarray(q, dtype=np.float64) + _EPSILON
+    p /= p.sum()
+    q /= q.sum()
+    m = (p + q) / 2
+    divergence = (np.sum(p * np.log2(p / m)) + np.sum(q * np.log2(q / m))) / 2
+    return float(max(divergence, 0.0))
+
+
+class CountMinSketch:
+    """Fixed-size frequency estimates for an unbounded set of strings
+
+    Also tracks the ``top_k`` items with the highest estimates, since the
+    sketch itself cannot list the items it has counted.
+    """
+
+    def __init__(self, width: int = 1024, depth: int = 4, seed: int = 0, top_k: int = 20):
+        self.width = width
+        self.depth = depth
+        self.top_k = top_k
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.top = {}
+        self._key = seed.to_bytes(8, 'little')
+
+    def _columns(self, item: str) -> List[int]:
+        # Double hashing from one keyed digest gives independent rows;
+        # hash() of (row, item) tuples collides in every row together
+        digest = hashlib.blake2b(item.encode(), digest_size=16, key=self._key).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + row * step) % self.width for row in range(self.depth)]
+
+    def add(self, item: str, count: int = 1):
+        for row, column in enumerate(self._columns(item)):
+            self.table[row, column] += count
+        if not self.top_k:
+            return
+        estimate = self.estimate(item)
+        if item in self.top or len(self.top) < self.top_k:
+            self.top[item] = estimate
+            return
+        smallest = min(self.top, key=self.top.get)
+        if estimate > self.top[smallest]:
+            del self.top[smallest]
+            self.top[item] = estimate
+
+    def most_common(self, limit: Optional[int] = None) -> List[tuple]:
+        """(item, estimated count) of the most frequent tracked items"""
+        return sorted(self.top.items(), key=lambda entry: (-entry[1], entry[0]))[:limit]
+
+    def estimate(self, item: str) -> int:
+        """Upper-bound estimate of how often ``item`` was added"""
+        return int(min(self.table[row, column] for row, column in enumerate(self._columns(item))))
+
+
+class ReservoirSample:
+    """Uniform sample of fixed size over everything seen so far (Algorithm R)"""
+
+    def __init__(self, size: int = 256, seed: Optional[int] = None):
+        self.size = size
+        self.items = []
+        self.seen = 0
+        self._random = random.Random(seed)
+
+    def add(self, item):
+        self.seen += 1
+        if len(self.items) < self.size:
+            self.items.append(item)
+            return
+        index = self._random.randrange(self.seen)
+        if index < self.size:
+            self.items[index] = item
+
+
+class DriftMonitor:
+    """Compare live symptom and prediction distributions with a baseline"""
+
+    def __init__(self, vocabulary: List[str], diseases: List[str],
+                 baseline_symptoms: np.ndarray, baseline_diseases: np.ndarray,
+                 baseline_lengths: np.ndarray, max_symptoms: int = 17,
+                 threshold: float = 0.1, check_interval: float = 60.0, min_requests: int = 100,
+                 reservoir_size: int = 256, sketch_width: int = 1024, sketch_depth: int = 4):
+        """
+        Args:
+            vocabulary: Known symptom names
+            diseases: Disease labels the model can predict
+            baseline_symptoms: Training counts per vocabulary symptom, with
+                unknown symptoms in a final extra bin
+            baseline_diseases: Training counts per disease
+            baseline_lengths: Training counts of symptoms-per-request (0..max_symptoms)
+            threshold: Jensen-Shannon score above which a distribution is drifted
+            check_interval: Seconds between background comparisons
+            min_requests: Requests needed before distributions are scored;
+                a handful of requests always looks drifted
+            reservoir_size: Size of the uniform sample kept over all requests
+        """
+        self._symptom_index = {symptom: i for i, symptom in enumerate(vocabulary)}
+        self._disease_index = {disease: i for i, disease in enumerate(diseases)}
+        self.vocabulary = tuple(vocabulary)
+        self.diseases = tuple(diseases)
+        self.max_symptoms = max_symptoms
+        self.threshold = threshold
+        self.check_interval = check_interval
+        self.min_requests = min_requests
+
+        self.baseline_symptoms = np.asarray(baseline_symptoms, dtype=np.int64)
+        self.baseline_diseases = np.asarray(baseline_diseases, dtype=np.int64)
+        self.baseline_lengths = np.asarray(baseline_lengths, dtype=np.int64)
+
+        # Last bin of each histogram collects values outside the known set
+        self.symptom_counts = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        self.disease_counts = np.zeros(len(diseases) + 1, dtype=np.int64)
+        self.length_counts = np.zeros(max_symptoms + 2, dtype=np.int64)
+        self.unknown_symptoms = CountMinSketch(sketch_width, sketch_depth)
+        self.reservoir = ReservoirSample(reservoir_size)
+        self.requests = 0
+
+        self._lock = threading.Lock()
+        self._report = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config, vocabulary: List[str]) -> 'DriftMonitor':
+        """Build a monitor whose baseline is computed from the training dataset"""
+        raw = pd.read_csv(config.DATASET_PATH)
+        diseases = sorted(raw['Disease'].str.strip().unique())
+        symptom_index = {symptom: i for i, symptom in enumerate(vocabulary)}
+
+        baseline_symptoms = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        baseline_lengths = np.zeros(config.MAX_SYMPTOMS + 2, dtype=np.int64)
+        for row in raw.drop(columns=['Disease']).values:
+            symptoms = [str(value).strip() for value in row if pd.notna(value)]
+            baseline_lengths[min(len(symptoms), config.MAX_SYMPTOMS + 1)] += 1
+            for symptom in symptoms:
+                baseline_symptoms[symptom_index.get(symptom, len(vocabulary))] += 1
+        baseline_diseases = raw['Disease'].str.strip().value_counts().reindex(diseases).values
+
+        return cls(vocabulary, diseases, baseline_symptoms, baseline_diseases, baseline_lengths,
+                   max_symptoms=config.MAX_SYMPTOMS, threshold=config.DRIFT_THRESHOLD,
+                   check_interval=config.DRIFT_CHECK_INTERVAL,
+                   min_requests=config.DRIFT_MIN_REQUESTS,
+                   reservoir_size=config.DRIFT_RESERVOIR_SIZE)
+
+    def observe(self, symptoms: List[str], disease: Optional[str] = None):
+        """Record one request; cost is bounded by the number of symptoms"""
+        unknown_bin = len(self.vocabulary)
+        with self._lock:
+            self.requests += 1
+            self.length_counts[min(len(symptoms), self.max_symptoms + 1)] += 1
+            for symptom in symptoms:
+                index = self._symptom_index.get(symptom)
+                if index is None:
+                    self.symptom_counts[unknown_bin] += 1
+                    self.unknown_symptoms.add(symptom)
+                else:
+                    self.symptom_counts[index] += 1
+            if disease is not None:
+                self.disease_counts[self._disease_index.get(disease, len(self.diseases))] += 1
+            self.reservoir.add(tuple(symptoms))
+
+    def estimate_unknown(self, symptom: str) -> int:
+        """Estimated number of times an unknown symptom has been seen"""
+        with self._lock:
+            return self.unknown_symptoms.estimate(symptom)
+
+    def _top_shifts(self, live: np.ndarray, baseline: np.ndarray, names: List[str],
+                    limit: int = 5) -> List[Dict]:
+        live_share = live / max(live.sum(), 1)
+        baseline_share = baseline / max(baseline.sum(), 1)
+        change = live_share - baseline_share
+        return [
+            {"name": names[i], "live": float(live_share[i]), "baseline": float(baseline_share[i]),
+             "change": float(change[i])}
+            for i in np.argsort(-np.abs(change))[:limit]
+        ]
+
+    def compute_report(self, include_requests: bool = False) -> Dict:
+        """
+        Compare the current sketches with the baseline
+
+        Args:
+            include_requests: Keep the sampled requests and the unknown
+                symptom strings, which repeat caller input verbatim
+        """
+        with self._lock:
+            symptom_counts = self.symptom_counts.copy()
+            disease_counts = self.disease_counts.copy()
+            length_counts = self.length_counts.copy()
+            requests = self.requests
+            sample = list(self.reservoir.items[:10])
+            top_unknown = self.unknown_symptoms.most_common(10)
+
+        baseline_diseases = np.append(self.baseline_diseases, 0)
+        scores = {}
+        if requests and requests >= self.min_requests:
+            scores = {
+                "symptoms": jensen_shannon(symptom_counts, self.baseline_symptoms),
+                "symptoms_per_request": jensen_shannon(length_counts, self.baseline_lengths),
+            }
+            if disease_counts.sum():
+                scores["predicted_disease"] = jensen_shannon(disease_counts, baseline_diseases)
+
+        symptom_names = list(self.vocabulary) + ['<unknown>']
+        disease_names = list(self.diseases) + ['<other>']
+        report = {
+            "requests": requests,
+            "computed_at": time.time(),
+            "min_requests": self.min_requests,
+            "threshold": self.threshold,
+            "scores": scores,
+            "drifted": sorted(name for name, score in scores.items() if score > self.threshold),
+            "unknown_symptom_rate": float(symptom_counts[-1] / max(symptom_counts.sum(), 1)),
+            "baseline_unknown_symptom_rate": float(
+                self.baseline_symptoms[-1] / max(self.baseline_symptoms.sum(), 1)),
+            "top_unknown_symptoms": [{"name": name, "estimated_count": count}
+                                     for name, count in top_unknown],
+            "top_symptom_shifts": self._top_shifts(symptom_counts, self.baseline_symptoms,
+                                                   symptom_names) if requests else [],
+            "top_disease_shifts": self._top_shifts(disease_counts, baseline_diseases,
+                                                   disease_names) if disease_counts.sum() else [],
+            "sample": [list(symptoms) for symptoms in sample],
+        }
+        self._report = report
+        return self._redact(report, include_requests)
+
+    def get_report(self, include_requests: bool = False) -> Dict:
+        """Latest periodic report, computing one if none exists yet"""
+        if self._report is None:
+            return self.compute_report(include_requests)
+        return self._redact(self._report, include_requests)
+
+    @staticmethod
+    def _redact(report: Dict, include_requests: bool) -> Dict:
+        if include_requests:
+            return report
+        return {key: value for key, value in report.items() if key not in REQUEST_CONTENT_KEYS}
+
+    def start(self):
+        """Start comparing against the baseline every ``check_interval`` seconds"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='drift-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            try:
+                report = self.compute_report()
+                if report["drifted"]:
+                    logger.warning(f"Input drift detected in {report['drifted']}: {report['scores']}")
+            except Exception as e:
+                logger.error(f"Error computing drift report: {str(e)}")
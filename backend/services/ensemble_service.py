@@ -0,0 +1,205 @@
+"""
+Ensemble service for evaluating several models on the same input matrix
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import numpy as np
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('vote', 'proba')
+
+
+class EnsemblePredictor:
+    """Run several models concurrently and combine their predictions
+
+    Every model gets the same encoded input matrix and its own latency
+    budget, measured from the moment the ensemble call starts. Models that
+    miss their budget are left out of the combination and the result is
+    marked partial; their work keeps running in the pool (threads cannot be
+    cancelled), so ``max_workers`` should leave headroom for stragglers.
+
+    sklearn trees, libsvm and NumPy release the GIL during prediction, so the
+    models overlap on a thread pool.
+    """
+
+    def __init__(self, models: List[Dict], method: str = 'vote',
+                 default_budget_ms: float = 100.0, max_workers: Optional[int] = None):
+        """
+        Args:
+            models: List of {'name', 'model', 'budget_ms'} dictionaries; the
+                first model has priority when votes tie
+            method: 'vote' for majority voting or 'proba' for probability
+                averaging (models without predict_proba vote one-hot)
+            default_budget_ms: Budget for models that do not set one
+            max_workers: Thread pool size, defaults to twice the model count
+        """
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {METHODS}")
+        if not models:
+            raise ValueError("At least one model is required")
+
+        self.method = method
+        self.members = [
+            {
+                "name": member["name"],
+                "model": member["model"],
+                "budget_ms": member.get("budget_ms") or default_budget_ms,
+            }
+            for member in models
+        ]
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or 2 * len(models),
+                                            thread_name_prefix='ensemble')
+        self._lock = threading.Lock()
+        self._metrics = {
+            member["name"]: {"calls": 0, "timeouts": 0, "errors": 0, "total_ms": 0.0,
+                             "max_ms": 0.0, "last_ms": None}
+            for member in self.members
+        }
+
+    @classmethod
+    def from_config(cls, config, loader) -> 'EnsemblePredictor':
+        """
+        Build the ensemble from ``config.ENSEMBLE_MODELS``
+
+        Args:
+            config: Configuration with the ENSEMBLE_* settings
+            loader: Callable loading a model from a file path
+        """
+        models = [
+            {
+                "name": entry["name"],
+                "model": loader(entry["path"]),
+                "budget_ms": entry.get("budget_ms"),
+            }
+            for entry in config.ENSEMBLE_MODELS
+        ]
+        logger.info(f"Ensemble loaded: {[model['name'] for model in models]}")
+        return cls(models, method=config.ENSEMBLE_METHOD,
+                   default_budget_ms=config.ENSEMBLE_DEFAULT_BUDGET_MS,
+                   max_workers=config.ENSEMBLE_MAX_WORKERS)
+
+    @property
+    def names(self) -> List[str]:
+        return [member["name"] for member in self.members]
+
+    def _evaluate(self, member: Dict, X) -> Dict:
+        """Run one model; executed on the pool"""
+        start = time.perf_counter()
+        model = member["model"]
+        if self.method == 'proba' and hasattr(model, 'predict_proba'):
+            proba = np.asarray(model.predict_proba(X))
+            labels = np.asarray(model.classes_)[proba.argmax(axis=1)]
+        else:
+            proba = None
+            labels = np.asarray(model.predict(X))
+        return {
+            "labels": labels.astype(str),
+            "proba": proba,
+            "classes": np.asarray(model.classes_).astype(str) if proba is not None else None,
+            "elapsed_ms": (time.perf_counter() - start) * 1000,
+        }
+
+    def _record(self, name: str, elapsed_ms: Optional[float] = None,
+                timeout: bool = False, error: bool = False):
+        with self._lock:
+            metrics = self._metrics[name]
+            metrics["calls"] += 1
+            if timeout:
+                metrics["timeouts"] += 1
+            elif error:
+                metrics["errors"] += 1
+            else:
+                metrics["total_ms"] += elapsed_ms
+                metrics["max_ms"] = max(metrics["max_ms"], elapsed_ms)
+                metrics["last_ms"] = elapsed_ms
+
+    def predict(self, X) -> Dict:
+        """
+        Predict with every model and combine the results
+
+        Args:
+            X: Encoded input matrix shared by all models
+
+        Returns:
+            Dictionary with combined ``predictions``, whether the result is
+            ``partial``, the models ``used`` and ``skipped`` and each used
+            model's ``latency_ms``
+        """
+        start = time.perf_counter()
+        futures = [(member, self._executor.submit(self._evaluate, member, X))
+                   for member in self.members]
+
+        outputs, skipped = [], []
+        for member, future in futures:
+            remaining = member["budget_ms"] / 1000 - (time.perf_counter() - start)
+            try:
+                output = future.result(timeout=max(remaining, 0))
+            except TimeoutError:
+                logger.warning(f"Ensemble model {member['name']} exceeded its "
+                               f"{member['budget_ms']} ms budget")
+                self._record(member["name"], timeout=True)
+                skipped.append(member["name"])
+                continue
+            except Exception as e:
+                logger.error(f"Ensemble model {member['name']} failed: {str(e)}")
+                self._record(member["name"], error=True)
+                skipped.append(member["name"])
+                continue
+            self._record(member["name"], output["elapsed_ms"])
+            outputs.append((member["name"], output))
+
+        if not outputs:
+            raise RuntimeError("No ensemble model finished within its latency budget")
+
+        combine = self._average if self.method == 'proba' else self._vote
+        return {
+            "predictions": combine([output for _, output in outputs]),
+            "partial": bool(skipped),
+            "used": [name for name, _ in outputs],
+            "skipped": skipped,
+            "latency_ms": {name: output["elapsed_ms"] for name, output in outputs},
+        }
+
+    @staticmethod
+    def _vote(outputs: List[Dict]) -> np.ndarray:
+        """Majority vote per row; ties go to the earliest model"""
+        labels = np.stack([output["labels"] for output in outputs], axis=1)
+        predictions = []
+        for row in labels:
+            values, counts = np.unique(row, return_counts=True)
+            winners = set(values[counts == counts.max()])
+            predictions.append(next(label for label in row if label in winners))
+        return np.array(predictions)
+
+    @staticmethod
+    def _average(outputs: List[Dict]) -> np.ndarray:
+        """Average class probabilities over the union of classes"""
+        classes = np.unique(np.concatenate([
+            output["classes"] if output["classes"] is not None else output["labels"]
+            for output in outputs
+        ]))
+        total = np.zeros((len(outputs[0]["labels"]), len(classes)))
+        for output in outputs:
+            if output["proba"] is not None:
+                columns = np.searchsorted(classes, output["classes"])
+                total[:, columns] += output["proba"]
+            else:
+                total[np.arange(len(total)), np.searchsorted(classes, output["labels"])] += 1
+        return classes[total.argmax(axis=1)]
+
+    def get_metrics(self) -> Dict[str, Dict]:
+        """Per-model call counts, timeouts and latency"""
+        with self._lock:
+            metrics = {}
+            for name, values in self._metrics.items():
+                completed = values["calls"] - values["timeouts"] - values["errors"]
+                metrics[name] = dict(values, mean_ms=values["total_ms"] / completed if completed else None)
+            return metrics
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        self._executor.shutdown(wait=False)
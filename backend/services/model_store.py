@@ -0,0 +1,240 @@
+"""
+Model store for serving several model versions side by side
+"""
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+import logging
+
+from services.compact_forest import _get_trees
+
+logger = logging.getLogger(__name__)
+
+ROUTING_BUCKETS = 10000
+_LATENCY_WINDOW = 1024
+# Version fields left out of the metrics served by the public GET /models
+_PRIVATE_FIELDS = ('path', 'latency_ms')
+
+
+def estimate_model_bytes(model) -> int:
+    """Approximate in-memory size of a loaded model"""
+    if hasattr(model, 'nbytes'):
+        return int(model.nbytes)
+    try:
+        trees = _get_trees(model)
+    except ValueError:
+        return len(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    # sklearn keeps the node records and the value array outside the Python objects
+    return sum(tree.__getstate__()['nodes'].nbytes + tree.value.nbytes for tree in trees)
+
+
+class ModelStore:
+    """Registered model versions, loaded on first use and evicted least recently used
+
+    Versions are registered with a path and an optional share of traffic.
+    At most ``max_loaded`` versions stay in memory, and fewer when their
+    combined size exceeds ``memory_budget_bytes``; the default version is
+    pinned and never evicted. Loading happens outside the store lock, one
+    load per version at a time, so a slow load does not block requests for
+    versions already in memory.
+    """
+
+    def __init__(self, loader: Callable[[str], Tuple], max_loaded: int = 2,
+                 memory_budget_bytes: Optional[int] = None):
+        """
+        Args:
+            loader: Callable returning (model, explainer or None) for a path
+            max_loaded: Maximum number of versions held in memory
+            memory_budget_bytes: Optional cap on the estimated size of the
+                loaded versions
+        """
+        self.loader = loader
+        self.max_loaded = max_loaded
+        self.memory_budget_bytes = memory_budget_bytes
+        self.default = None
+        self._versions = OrderedDict()
+        self._loaded = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    @classmethod
+    def from_config(cls, config, loader: Callable[[str], Tuple]) -> 'ModelStore':
+        """Create a store holding the versions in ``config.MODEL_VERSIONS``"""
+        budget_mb = config.MODEL_STORE_MEMORY_BUDGET_MB
+        store = cls(loader, max_loaded=config.MODEL_STORE_MAX_LOADED,
+                    memory_budget_bytes=int(budget_mb * 1e6) if budget_mb else None)
+        for entry in config.MODEL_VERSIONS:
+            store.register(entry["name"], entry["path"], entry.get("percent", 0.0))
+        logger.info(f"Model versions registered: {store.names}")
+        return store
+
+    def register(self, name: str, path: str, percent: float = 0.0, pinned: bool = False,
+                 model=None, explainer=None, default: bool = False):
+        """
+        Register a version
+
+        Args:
+            percent: Share of hashed traffic routed to this version
+            pinned: Never evict this version
+            model: Already loaded model, skipping the lazy load
+            default: Serve this version to traffic no percentage claims
+                (otherwise the first registered version is the default)
+        """
+        if name in self._versions:
+            raise ValueError(f"Model version {name} is already registered")
+        if percent < 0 or self.routed_percent + percent > 100:
+            raise ValueError("Routed traffic percentages must add up to at most 100")
+
+        self._versions[name] = {
+            "path": path, "percent": percent, "pinned": pinned,
+            "hits": 0, "loads": 0, "evictions": 0, "errors": 0,
+            "load_ms_total": 0.0, "load_ms_last": None,
+            "latency_ms": deque(maxlen=_LATENCY_WINDOW),
+        }
+        self._load_locks[name] = threading.Lock()
+        if default or self.default is None:
+            self.default = name
+        if model is not None:
+            with self._lock:
+                self._insert(name, model, explainer)
+
+    @property
+    def routed_percent(self) -> float:
+        return sum(version["percent"] for version in self._versions.values())
+
+    @property
+    def names(self):
+        return list(self._versions)
+
+    def route(self, key: str, requested: Optional[str] = None) -> str:
+        """
+        Choose the version for a request
+
+        Args:
+            key: Routing key; the same key always maps to the same version
+            requested: Explicitly requested version, which takes precedence
+        """
+        if requested:
+            if requested not in self._versions:
+                raise ValueError(f"Unknown model version: {requested}")
+            return requested
+
+        bucket = zlib.crc32(key.encode()) % ROUTING_BUCKETS
+        upper = 0.0
+        for name, version in self._versions.items():
+            upper += version["percent"] * ROUTING_BUCKETS / 100
+            if bucket < upper:
+                return name
+        return self.default
+
+    def get(self, name: str) -> Tuple:
+        """Return (model, explainer) for a version, loading it if needed"""
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is not None:
+                self._loaded.move_to_end(name)
+                self._versions[name]["hits"] += 1
+                return entry["model"], entry["explainer"]
+            if name not in self._versions:
+                raise ValueError(f"Unknown model version: {name}")
+
+        with self._load_locks[name]:
+            with self._lock:
+                entry = self._loaded.get(name)
+            if entry is None:
+                entry = self._load(name)
+
+        with self._lock:
+            self._versions[name]["hits"] += 1
+            if name in self._loaded:
+                self._loaded.move_to_end(name)
+        return entry["model"], entry["explainer"]
+
+    def _load(self, name: str) -> Dict:
+        version = self._versions[name]
+        start = time.perf_counter()
+        try:
+            model, explainer = self.loader(version["path"])
+        except Exception as e:
+            with self._lock:
+                version["errors"] += 1
+            logger.error(f"Error loading model version {name}: {str(e)}")
+            raise
+        load_ms = (time.perf_counter() - start) * 1000
+
+        with self._lock:
+            version["loads"] += 1
+            version["load_ms_total"] += load_ms
+            version["load_ms_last"] = load_ms
+            entry = self._insert(name, model, explainer)
+        logger.info(f"Loaded model version {name} in {load_ms:.1f} ms "
+                    f"({entry['nbytes'] / 1e6:.1f} MB)")
+        return entry
+
+    def _insert(self, name: str, model, explainer) -> Dict:
+        """Add a loaded version and evict others to respect the limits; needs the lock"""
+        nbytes = estimate_model_bytes(model)
+        if explainer is not None:
+            nbytes += explainer.nbytes
+        entry = {"model": model, "explainer": explainer, "nbytes": nbytes}
+        self._loaded[name] = entry
+
+        for candidate in list(self._loaded):
+            if not self._over_limits():
+                break
+            if candidate == name or self._versions[candidate]["pinned"]:
+                continue
+            del self._loaded[candidate]
+            self._versions[candidate]["evictions"] += 1
+            logger.info(f"Evicted model version {candidate}")
+        if self._over_limits():
+            logger.warning(f"Model store is over its limits with {list(self._loaded)} loaded")
+        return entry
+
+    def _over_limits(self) -> bool:
+        if len(self._loaded) > self.max_loaded:
+            return True
+        return (self.memory_budget_bytes is not None
+                and self.loaded_bytes > self.memory_budget_bytes)
+
+    @property
+    def loaded_bytes(self) -> int:
+        return sum(entry["nbytes"] for entry in self._loaded.values())
+
+    def record(self, name: str, latency_ms: float):
+        """Record the latency of a request served by a version"""
+        with self._lock:
+            self._versions[name]["latency_ms"].append(latency_ms)
+
+    def get_metrics(self) -> Dict:
+        """Per-version routing share, hit counts, load times and latency (no file paths)"""
+        with self._lock:
+            versions = {}
+            for name, version in self._versions.items():
+                latencies = np.array(version["latency_ms"])
+                metrics = {key: value for key, value in version.items()
+                           if key not in _PRIVATE_FIELDS}
+                metrics.update(
+                    default=name == self.default,
+                    loaded=name in self._loaded,
+                    bytes=self._loaded[name]["nbytes"] if name in self._loaded else None,
+                    latency={
+                        "window": int(latencies.size),
+                        "p50_ms": float(np.percentile(latencies, 50)),
+                        "p99_ms": float(np.percentile(latencies, 99)),
+                        "mean_ms": float(latencies.mean()),
+                    } if latencies.size else None,
+                )
+                versions[name] = metrics
+            return {
+                "default": self.default,
+                "max_loaded": self.max_loaded,
+                "memory_budget_bytes": self.memory_budget_bytes,
+                "loaded": list(self._loaded),
+                "loaded_bytes": self.loaded_bytes,
+                "versions": versions,
+            }
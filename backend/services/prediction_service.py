@@ -1,38 +1,123 @@
 """
 Prediction service for disease prediction using ML models
 """
+import os
+import time
 import numpy as np
-from joblib import load
-from typing import List, Dict, Optional
+from joblib import load, parallel_backend
+from typing import List, Dict, Optional, Tuple
 import logging
+from services.compact_forest import CompactForest
+from services.explanation_service import TreeExplainer
 
 logger = logging.getLogger(__name__)
 
+def defer_n_jobs(model):
+    """Clear the n_jobs saved with a model so the threading policy decides at predict time"""
+    if getattr(model, 'n_jobs', None) is not None:
+        model.n_jobs = None
+    return model
+
+def load_model_file(path: str, clear_n_jobs: bool = False):
+    """Load a compact forest (.npz) or a joblib/pickle sklearn model
+
+    ``clear_n_jobs`` defers the model's parallelism to an active threading policy.
+    """
+    if path.endswith('.npz'):
+        return CompactForest.load(path)
+    model = load(path)
+    return defer_n_jobs(model) if clear_n_jobs else model
+
+def build_explainer(model) -> Optional[TreeExplainer]:
+    """Precompute node distributions; only sklearn tree models keep them"""
+    if isinstance(model, CompactForest):
+        logger.warning("Explanations are not available for compact models")
+        return None
+    try:
+        return TreeExplainer(model)
+    except ValueError as e:
+        logger.warning(f"Explanations are not available for this model: {str(e)}")
+        return None
+
+def load_model_version(path: str, explanations: bool = True,
+                       clear_n_jobs: bool = False) -> Tuple:
+    """Load a model and, when enabled, its explainer for the model store"""
+    model = load_model_file(path, clear_n_jobs)
+    return model, build_explainer(model) if explanations else None
+
 class PredictionService:
     """Service class for disease prediction operations"""
     
-    def __init__(self, config, data_service):
+    def __init__(self, config, data_service, audit_logger=None, ensemble=None,
+                 drift_monitor=None, model_store=None, threading_policy=None):
         self.config = config
         self.data_service = data_service
+        self.audit_logger = audit_logger
+        self.ensemble = ensemble
+        self.drift_monitor = drift_monitor
+        self.model_store = model_store
+        self.threading_policy = threading_policy
+        # joblib n_jobs for single-row and batch predictions; None keeps joblib's default
+        self.single_row_n_jobs = threading_policy.single_row_n_jobs if threading_policy else None
+        self.batch_n_jobs = threading_policy.batch_n_jobs if threading_policy else None
         self.model = None
-        self._load_model()
+        self.model_path = None
+        self.model_version = None
+        self.explainer = None
+        if ensemble is not None:
+            self.model_version = 'ensemble:' + '+'.join(ensemble.names)
+        else:
+            self._load_model()
+            if model_store is not None:
+                # Versions share this service's encoder and lookup tables
+                model_store.register(self.model_version, self.model_path, pinned=True,
+                                     model=self.model, explainer=self.explainer, default=True)
     
     def _load_model(self):
         """Load the trained ML model"""
         try:
-            self.model = load(self.config.MODEL_PATH)
+            if self.config.MODEL_FORMAT == 'compact':
+                path = self._compact_model_path()
+                self.model = CompactForest.load(path)
+            else:
+                path = self.config.MODEL_PATH
+                self.model = load(path)
+                if self.threading_policy is not None:
+                    defer_n_jobs(self.model)
+            self.model_path = path
+            self.model_version = os.path.splitext(os.path.basename(path))[0]
             logger.info("Model loaded successfully")
+            if self.config.EXPLANATIONS_ENABLED:
+                self._build_explainer()
         except Exception as e:
             logger.error(f"Error loading model: {str(e)}")
             raise
     
+    def _build_explainer(self):
+        """Precompute node distributions for the loaded model"""
+        self.explainer = build_explainer(self.model)
+    
+    def _select_model(self, symptoms: List[str], version: Optional[str],
+                      routing_key: Optional[str]) -> Tuple:
+        """Return (model, explainer, version name) for a request"""
+        if self.model_store is None:
+            if version and version != self.model_version:
+                raise ValueError(f"Unknown model version: {version}")
+            return self.model, self.explainer, self.model_version
+        name = self.model_store.route(routing_key or ','.join(sorted(symptoms)), version)
+        model, explainer = self.model_store.get(name)
+        return model, explainer, name
+    
+    def _compact_model_path(self) -> str:
+        """Path of the configured model tier, or of the full compact forest"""
+        if self.config.MODEL_TIER:
+            return os.path.join(self.config.MODEL_TIERS_DIR, f"{self.config.MODEL_TIER}.npz")
+        return self.config.COMPACT_MODEL_PATH
+    
     def _convert_symptoms_to_weights(self, symptoms: List[str]) -> List[float]:
         """Convert symptom names to their corresponding weights"""
         try:
-            symptom_weights = dict(zip(
-                self.data_service.symptom_severity['Symptom'],
-                self.data_service.symptom_severity['weight']
-            ))
+            symptom_weights = self.data_service.get_symptom_weights()
             
             weights = []
             for symptom in symptoms:
@@ -62,40 +147,113 @@ class PredictionService:
             logger.error(f"Error preparing input vector: {str(e)}")
             raise
     
-    def predict_disease(self, symptoms: List[str]) -> Dict[str, any]:
+    def _explain(self, explainer: TreeExplainer, symptoms: List[str],
+                 input_vector: List[List[float]], disease: str) -> Dict[str, any]:
+        """Contribution of each symptom the caller sent to the predicted disease"""
+        target = int(np.flatnonzero(explainer.classes_ == disease)[0])
+        explanation = explainer.explain(input_vector, targets=[target])
+        contributions = explanation["contributions"][0]
+        
+        # Input position i holds the weight of the i-th symptom sent
+        by_symptom = {}
+        for position, symptom in enumerate(symptoms):
+            by_symptom[symptom] = by_symptom.get(symptom, 0.0) + float(contributions[position])
+        
+        return {
+            "method": "saabas",
+            "probability": float(explanation["proba"][0, target]),
+            "base_value": float(explanation["bias"][0]),
+            "contributions": [
+                {"symptom": symptom, "contribution": contribution}
+                for symptom, contribution in sorted(by_symptom.items(), key=lambda item: -item[1])
+            ],
+            "empty_slots": float(contributions[len(symptoms):].sum()),
+        }
+    
+    def _predict(self, model, input_vector, n_jobs: Optional[int]):
+        """Run the model with the joblib n_jobs the threading policy chose"""
+        if n_jobs is None:
+            return model.predict(input_vector)
+        with parallel_backend('threading', n_jobs=n_jobs):
+            return model.predict(input_vector)
+    
+    def _validate_symptoms(self, symptoms: List[str]):
+        """Check the number of symptoms in one request"""
+        if not symptoms or len(symptoms) < self.config.MIN_SYMPTOMS:
+            raise ValueError(f"At least {self.config.MIN_SYMPTOMS} symptom required")
+        
+        if len(symptoms) > self.config.MAX_SYMPTOMS:
+            raise ValueError(f"Maximum {self.config.MAX_SYMPTOMS} symptoms allowed")
+    
+    def _describe(self, disease: str) -> Dict[str, any]:
+        """Attach the description and precautions of a predicted disease"""
+        descriptions = self.data_service.get_disease_descriptions()
+        precautions = self.data_service.get_disease_precautions()
+        return {
+            "disease": disease,
+            "description": descriptions.get(disease, "Description not available"),
+            "precautions": precautions.get(disease, [])
+        }
+    
+    def predict_disease(self, symptoms: List[str], explain: bool = False,
+                        version: Optional[str] = None,
+                        routing_key: Optional[str] = None) -> Dict[str, any]:
         """
         Predict disease based on symptoms
         
         Args:
             symptoms: List of symptom names
+            explain: Add the contribution of each symptom to the prediction
+            version: Model version to use instead of the routed one
+            routing_key: Key hashed to pick a version, defaults to the symptoms
             
         Returns:
             Dictionary containing disease, description, and precautions
         """
         try:
+            start = time.perf_counter()
+            
             # Validate input
-            if not symptoms or len(symptoms) < self.config.MIN_SYMPTOMS:
-                raise ValueError(f"At least {self.config.MIN_SYMPTOMS} symptom required")
+            self._validate_symptoms(symptoms)
             
-            if len(symptoms) > self.config.MAX_SYMPTOMS:
-                raise ValueError(f"Maximum {self.config.MAX_SYMPTOMS} symptoms allowed")
+            if self.ensemble is not None:
+                model, explainer, model_version = None, None, self.model_version
+            else:
+                model, explainer, model_version = self._select_model(symptoms, version,
+                                                                     routing_key)
+            if explain and explainer is None:
+                raise ValueError("Explanations are not available for the served model")
             
             # Prepare input
             input_vector = self._prepare_input_vector(symptoms)
             
             # Make prediction
-            prediction = self.model.predict(input_vector)
-            disease = prediction[0]
+            if self.ensemble is not None:
+                outcome = self.ensemble.predict(input_vector)
+                disease = outcome["predictions"][0]
+            else:
+                prediction = self._predict(model, input_vector, self.single_row_n_jobs)
+                disease = prediction[0]
             
             # Get additional information
-            descriptions = self.data_service.get_disease_descriptions()
-            precautions = self.data_service.get_disease_precautions()
+            result = self._describe(disease)
+            if self.ensemble is not None:
+                result["partial"] = outcome["partial"]
+                result["models"] = outcome["used"]
+            if explain:
+                result["explanation"] = self._explain(explainer, symptoms, input_vector,
+                                                      disease)
+            if self.model_store is not None:
+                result["model_version"] = model_version
+            
+            if self.drift_monitor is not None:
+                self.drift_monitor.observe(symptoms, disease)
             
-            result = {
-                "disease": disease,
-                "description": descriptions.get(disease, "Description not available"),
-                "precautions": precautions.get(disease, [])
-            }
+            latency_ms = (time.perf_counter() - start) * 1000
+            if self.model_store is not None:
+                self.model_store.record(model_version, latency_ms)
+            if self.audit_logger is not None:
+                self.audit_logger.record(symptoms, disease, model_version, latency_ms)
             
             logger.info(f"Prediction successful: {disease}")
             return result
@@ -103,3 +261,63 @@ class PredictionService:
         except Exception as e:
             logger.error(f"Error in disease prediction: {str(e)}")
             raise
+    
+    def predict_batch(self, symptom_lists: List[List[str]], version: Optional[str] = None,
+                      routing_key: Optional[str] = None) -> List[Dict[str, any]]:
+        """
+        Predict diseases for several symptom lists with one model call
+        
+        Args:
+            symptom_lists: One list of symptom names per request
+            version: Model version to use instead of the routed one
+            routing_key: Key hashed to pick a version, defaults to the
+                symptoms of the first request
+            
+        Returns:
+            One dictionary per request, as returned by predict_disease
+        """
+        try:
+            start = time.perf_counter()
+            if not symptom_lists:
+                raise ValueError("At least one request is required")
+            for symptoms in symptom_lists:
+                self._validate_symptoms(symptoms)
+            
+            input_matrix = [self._prepare_input_vector(symptoms)[0] for symptoms in symptom_lists]
+            if self.ensemble is not None:
+                outcome = self.ensemble.predict(input_matrix)
+                diseases = outcome["predictions"]
+                model_version = self.model_version
+            else:
+                model, _, model_version = self._select_model(symptom_lists[0], version,
+                                                             routing_key)
+                diseases = self._predict(model, input_matrix, self.batch_n_jobs)
+            
+            results = []
+            for disease in diseases:
+                result = self._describe(disease)
+                if self.ensemble is not None:
+                    result["partial"] = outcome["partial"]
+                    result["models"] = outcome["used"]
+                if self.model_store is not None:
+                    result["model_version"] = model_version
+                results.append(result)
+            
+            if self.drift_monitor is not None:
+                for symptoms, disease in zip(symptom_lists, diseases):
+                    self.drift_monitor.observe(symptoms, disease)
+            
+            # Each record carries its share of the batch latency
+            latency_ms = (time.perf_counter() - start) * 1000 / len(symptom_lists)
+            if self.model_store is not None:
+                self.model_store.record(model_version, latency_ms)
+            if self.audit_logger is not None:
+                for symptoms, disease in zip(symptom_lists, diseases):
+                    self.audit_logger.record(symptoms, disease, model_version, latency_ms)
+            
+            logger.info(f"Batch prediction successful: {len(results)} requests")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Error in batch disease prediction: {str(e)}")
+            raise
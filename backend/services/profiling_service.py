@@ -0,0 +1,138 @@
+"""
+Profiling helpers for the admin profiling endpoints
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+SORT_KEYS = ('cumulative', 'tottime', 'calls')
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (peak RSS where /proc is unavailable)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Counter:
+    """
+    Sample the Python stacks of every other thread in this process
+
+    Args:
+        seconds: How long to sample for
+        interval: Seconds between samples
+
+    Returns:
+        Counter mapping collapsed stacks ("thread;outer;...;inner") to the
+        number of samples they appeared in
+    """
+    own_id = threading.get_ident()
+    stacks = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, f"thread-{thread_id}"))
+            stacks[';'.join(reversed(labels))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def format_collapsed(stacks: Counter) -> str:
+    """Render stacks in the collapsed format read by flamegraph.pl and speedscope"""
+    return ''.join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class BackgroundSampler:
+    """Sample stacks on a daemon thread and write the result to a file
+
+    Needed for synchronous workers, where a blocking profile request would
+    occupy the only thread that serves traffic.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, seconds: float, interval: float) -> str:
+        """Start sampling; returns the path the stacks will be written to"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                raise RuntimeError("A background profile is already running")
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir,
+                                f"profile-{os.getpid()}-{int(time.time())}.folded")
+            self._thread = threading.Thread(target=self._run, args=(path, seconds, interval),
+                                            name='profiler', daemon=True)
+            self._thread.start()
+            return path
+
+    def _run(self, path: str, seconds: float, interval: float):
+        try:
+            stacks = sample_stacks(seconds, interval)
+            with open(path, 'w') as f:
+                f.write(format_collapsed(stacks))
+            logger.info(f"Wrote {sum(stacks.values())} stack samples to {path}")
+        except Exception as e:
+            logger.error(f"Error in background profile: {str(e)}")
+
+
+def profile_call(func: Callable, *args, sort: str = 'cumulative', limit: int = 30,
+                 **kwargs) -> Tuple[Any, Dict]:
+    """
+    Run ``func`` under cProfile
+
+    Returns:
+        The function's result and a dictionary with the wall time and the
+        formatted pstats table of the top ``limit`` entries
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of {SORT_KEYS}")
+
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.sort_stats(sort).print_stats(limit)
+    return result, {
+        "wall_ms": elapsed_ms,
+        "total_calls": stats.total_calls,
+        "sort": sort,
+        "stats": output.getvalue(),
+    }
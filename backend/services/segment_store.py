@@ -0,0 +1,188 @@
+"""
+Append-only segment store for incrementally ingested dataset records
+
+Every ingestion batch is written as one immutable ``.npz`` segment holding
+the already encoded rows, their labels, the raw symptom names and the
+sequence number of the batch. Readers remember the last sequence they
+applied and only read rows past it. Compaction merges segments into one
+covering the same sequence range; the merged file is written before the
+old ones are removed, and readers ignore segments whose range is covered
+by another, so a reader never sees a row twice.
+"""
+import fcntl
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+import numpy as np
+import logging
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_NAME = re.compile(r'^segment-(\d{10})-(\d{10})\.npz$')
+_READ_ATTEMPTS = 3
+
+
+class SegmentStore:
+    """Directory of encoded record segments shared by ingestion and serving processes
+
+    Appends and compaction hold an exclusive ``flock`` on a lock file in the
+    directory, so the CLI, the API and background compaction in several
+    worker processes can share one store. Reads take no lock.
+    """
+
+    def __init__(self, directory: str):
+        # The directory is created by the first append, so followers of an
+        # unused store leave no trace on disk
+        self.directory = directory
+        self._lock_path = os.path.join(directory, '.lock')
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config) -> 'SegmentStore':
+        """Create a store in ``config.DATASET_SEGMENTS_DIR``"""
+        return cls(config.DATASET_SEGMENTS_DIR)
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._lock_path, 'a') as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def _path(self, first: int, last: int) -> str:
+        return os.path.join(self.directory, f"segment-{first:010d}-{last:010d}.npz")
+
+    def segments(self) -> List[Tuple[int, int, str]]:
+        """(first, last, path) of the live segments, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        ranges = []
+        for name in os.listdir(self.directory):
+            match = _SEGMENT_NAME.match(name)
+            if match:
+                ranges.append((int(match.group(1)), int(match.group(2)),
+                               os.path.join(self.directory, name)))
+        # Widest range first, so a compacted segment hides the ones it replaced
+        ranges.sort(key=lambda segment: (segment[0], -segment[1]))
+        live = []
+        for first, last, path in ranges:
+            if live and last <= live[-1][1]:
+                continue
+            live.append((first, last, path))
+        return live
+
+    @property
+    def last_sequence(self) -> int:
+        segments = self.segments()
+        return segments[-1][1] if segments else 0
+
+    def _write(self, path: str, **arrays):
+        """Write a segment atomically: readers see the whole file or nothing"""
+        temporary = os.path.join(self.directory, f".tmp-{os.getpid()}-{threading.get_ident()}.npz")
+        np.savez(temporary, **arrays)
+        os.replace(temporary, path)
+
+    def append(self, features: np.ndarray, labels: np.ndarray, symptoms: np.ndarray) -> int:
+        """
+        Write one batch of encoded records as a new segment
+
+        Args:
+            features: Encoded symptom weights (n_rows, n_columns)
+            labels: Disease label per row
+            symptoms: Symptom names per row, padded with empty strings
+
+        Returns:
+            The sequence number of the new segment
+        """
+        if not len(labels):
+            raise ValueError("Cannot append an empty segment")
+        with self._locked():
+            sequence = self.last_sequence + 1
+            self._write(self._path(sequence, sequence),
+                        features=np.asarray(features, dtype=np.uint8),
+                        labels=np.asarray(labels, dtype=str),
+                        symptoms=np.asarray(symptoms, dtype=str),
+                        sequence=np.full(len(labels), sequence, dtype=np.uint32))
+        logger.info(f"Appended segment {sequence} with {len(labels)} records")
+        return sequence
+
+    def read_since(self, sequence: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Read the rows appended after ``sequence``
+
+        Returns:
+            (features, labels, last sequence read); the arrays are empty
+            when there is nothing new
+        """
+        for attempt in range(_READ_ATTEMPTS):
+            try:
+                return self._read_since(sequence)
+            except FileNotFoundError:
+                # A segment was compacted away between listing and reading
+                if attempt == _READ_ATTEMPTS - 1:
+                    raise
+        raise AssertionError("unreachable")
+
+    def _read_since(self, sequence: int) -> Tuple[np.ndarray, np.ndarray, int]:
+        features, labels, last = [], [], sequence
+        for first, segment_last, path in self.segments():
+            if segment_last <= sequence:
+                continue
+            with np.load(path, allow_pickle=False) as segment:
+                keep = segment['sequence'] > sequence
+                features.append(segment['features'][keep])
+                labels.append(segment['labels'][keep])
+            last = segment_last
+        if not labels:
+            return np.empty((0, 0), dtype=np.uint8), np.empty(0, dtype=str), sequence
+        return np.concatenate(features), np.concatenate(labels), last
+
+    def compact(self, min_segments: int = 2) -> Optional[str]:
+        """
+        Merge all live segments into one once there are at least ``min_segments``
+
+        Returns:
+            Path of the merged segment, or None when nothing was compacted
+        """
+        with self._locked():
+            segments = self.segments()
+            if len(segments) < max(min_segments, 2):
+                return None
+
+            arrays = {'features': [], 'labels': [], 'symptoms': [], 'sequence': []}
+            for _, _, path in segments:
+                with np.load(path, allow_pickle=False) as segment:
+                    for key in arrays:
+                        arrays[key].append(segment[key])
+
+            path = self._path(segments[0][0], segments[-1][1])
+            self._write(path, **{key: np.concatenate(parts) for key, parts in arrays.items()})
+            for _, _, old_path in segments:
+                if old_path != path:
+                    os.remove(old_path)
+        logger.info(f"Compacted {len(segments)} segments into {os.path.basename(path)}")
+        return path
+
+    def start_compaction(self, interval: float, min_segments: int = 2):
+        """Compact every ``interval`` seconds on a daemon thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(interval, min_segments),
+                                        name='segment-compaction', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self, interval: float, min_segments: int):
+        while not self._stop.wait(interval):
+            try:
+                self.compact(min_segments)
+            except Exception as e:
+                logger.error(f"Error compacting segments: {str(e)}")
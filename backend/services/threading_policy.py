@@ -0,0 +1,117 @@
+"""
+Threading policy for inference workers
+
+Sizes the web workers, their request threads and the native (BLAS/OpenMP)
+thread pools from the CPUs actually available to the process, so that
+workers x threads x native threads does not oversubscribe the cores.
+"""
+import math
+import os
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Environment variables read by native libraries that are loaded after the policy is applied
+NATIVE_THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+                           'BLIS_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS', 'NUMEXPR_NUM_THREADS')
+
+_CGROUP_V2_CPU_MAX = '/sys/fs/cgroup/cpu.max'
+_CGROUP_V1_QUOTA = '/sys/fs/cgroup/cpu/cpu.cfs_quota_us'
+_CGROUP_V1_PERIOD = '/sys/fs/cgroup/cpu/cpu.cfs_period_us'
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def detect_cpu_quota() -> Optional[float]:
+    """CPUs allowed by the container's CFS quota (cgroup v2 or v1), None if unlimited"""
+    cpu_max = _read(_CGROUP_V2_CPU_MAX)
+    if cpu_max:
+        quota, _, period = cpu_max.partition(' ')
+        if quota != 'max' and period:
+            return int(quota) / int(period)
+        return None
+
+    quota, period = _read(_CGROUP_V1_QUOTA), _read(_CGROUP_V1_PERIOD)
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: the affinity mask capped by the CPU quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = detect_cpu_quota()
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(cpus, 1)
+
+
+class ThreadingPolicy:
+    """Worker, thread and n_jobs sizing for one deployment
+
+    Inference is CPU bound, so the default is one worker per available CPU,
+    each limited to the CPUs left per worker for native pools (normally
+    one). Single-row predictions run trees sequentially, where the cost of
+    dispatching to a pool outweighs the work; batches may use the worker's
+    native thread budget.
+    """
+
+    def __init__(self, cpus: int, workers: int, web_threads: int, native_threads: int,
+                 single_row_n_jobs: int = 1, batch_n_jobs: Optional[int] = None):
+        self.cpus = cpus
+        self.workers = workers
+        self.web_threads = web_threads
+        self.native_threads = native_threads
+        self.single_row_n_jobs = single_row_n_jobs
+        self.batch_n_jobs = batch_n_jobs or native_threads
+        self._limits = None
+
+    @classmethod
+    def from_config(cls, config, cpus: Optional[int] = None) -> 'ThreadingPolicy':
+        """Resolve the THREADING settings; 0 means size from the available CPUs"""
+        cpus = cpus or available_cpus()
+        workers = config.WEB_WORKERS or cpus
+        return cls(
+            cpus=cpus,
+            workers=workers,
+            web_threads=config.WEB_THREADS or 1,
+            native_threads=config.NATIVE_THREADS or max(cpus // workers, 1),
+            single_row_n_jobs=config.SINGLE_ROW_N_JOBS or 1,
+            batch_n_jobs=config.BATCH_N_JOBS or None,
+        )
+
+    def apply(self):
+        """Limit the native thread pools of this process (call once per worker)"""
+        from threadpoolctl import threadpool_limits
+        for variable in NATIVE_THREAD_VARIABLES:
+            os.environ.setdefault(variable, str(self.native_threads))
+        self._limits = threadpool_limits(limits=self.native_threads)
+        logger.info(f"Threading policy applied: {self.describe()}")
+        return self
+
+    def threadpool_info(self) -> list:
+        """Native thread pools loaded in this process and their current sizes"""
+        from threadpoolctl import threadpool_info
+        return [{"api": pool.get("user_api"), "library": pool.get("internal_api"),
+                 "num_threads": pool.get("num_threads")} for pool in threadpool_info()]
+
+    def describe(self) -> Dict:
+        return {
+            "cpus": self.cpus,
+            "cpu_quota": detect_cpu_quota(),
+            "workers": self.workers,
+            "web_threads": self.web_threads,
+            "native_threads": self.native_threads,
+            "single_row_n_jobs": self.single_row_n_jobs,
+            "batch_n_jobs": self.batch_n_jobs,
+        }
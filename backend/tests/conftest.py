@@ -0,0 +1,53 @@
+"""
+Shared fixtures for tests that fit small models or build the application
+"""
+import pytest
+import numpy as np
+from unittest.mock import patch
+from joblib import dump
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config, config
+
+@pytest.fixture(scope='module')
+def training_data():
+    """Symptom-weight-like integer features with a learnable label"""
+    rng = np.random.RandomState(0)
+    X = rng.randint(0, 8, size=(600, 17))
+    y = np.array(['Cold', 'Flu', 'Malaria'])[(X[:, 0] + X[:, 3] * 2 + X[:, 7]) % 3]
+    return X, y
+
+@pytest.fixture(scope='module')
+def forest(training_data):
+    """Small fitted random forest"""
+    X, y = training_data
+    return RandomForestClassifier(n_estimators=25, max_depth=8, random_state=42).fit(X, y)
+
+@pytest.fixture(scope='session')
+def fitted_model_path(tmp_path_factory):
+    """Small fitted model over the 17 symptom weight columns"""
+    model_path = str(tmp_path_factory.mktemp('model') / 'model.joblib')
+    rng = np.random.RandomState(0)
+    features = rng.randint(0, 8, size=(50, 17))
+    dump(DecisionTreeClassifier().fit(features, ['Fungal infection', 'Allergy'] * 25), model_path)
+    return model_path
+
+@pytest.fixture(scope='session')
+def app_factory(fitted_model_path):
+    """Build the real application with configuration overrides"""
+    def make_app(**overrides):
+        settings = {
+            'MODEL_PATH': fitted_model_path, 'MODEL_FORMAT': 'joblib', 'MODEL_TIER': None,
+            'AUDIT_ENABLED': False, 'DRIFT_ENABLED': False, 'DATASET_SEGMENTS_DIR': None,
+            'TESTING': True,
+        }
+        settings.update(overrides)
+        test_config = type('TestConfig', (Config,), settings)
+        with patch.dict(config, {'test': test_config}):
+            from app_refactored import create_app
+            return create_app('test')
+    return make_app
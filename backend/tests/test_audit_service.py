@@ -0,0 +1,118 @@
+"""
+Tests for the prediction audit log
+"""
+import pytest
+import json
+import sqlite3
+import threading
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.audit_service import AuditLogger
+from services.prediction_service import PredictionService
+
+class _SlowAuditLogger(AuditLogger):
+    """Audit logger whose writer waits until released, so the queue fills up"""
+
+    def __init__(self, *args, **kwargs):
+        self.release = threading.Event()
+        super().__init__(*args, **kwargs)
+
+    def _write(self, connection, batch):
+        self.release.wait(5)
+        super()._write(connection, batch)
+
+def _fetch_rows(db_path):
+    connection = sqlite3.connect(db_path)
+    try:
+        return connection.execute(
+            "SELECT symptoms, disease, model_version, latency_ms FROM predictions ORDER BY id"
+        ).fetchall()
+    finally:
+        connection.close()
+
+class TestAuditLogger:
+    """Test AuditLogger batching and queue policies"""
+
+    def test_records_written_in_batches(self, tmp_path):
+        """Queued records end up in the SQLite store"""
+        db_path = str(tmp_path / 'audit.db')
+        audit_logger = AuditLogger(db_path, batch_size=4)
+
+        for i in range(10):
+            assert audit_logger.record(['fever', 'cough'], 'Cold', 'v1', float(i))
+        assert audit_logger.flush()
+        audit_logger.close()
+
+        rows = _fetch_rows(db_path)
+        assert len(rows) == 10
+        assert json.loads(rows[0][0]) == ['fever', 'cough']
+        assert rows[-1][1:] == ('Cold', 'v1', 9.0)
+        assert audit_logger.get_stats()['written'] == 10
+
+    def test_wal_mode_enabled(self, tmp_path):
+        """The audit database uses write-ahead logging"""
+        db_path = str(tmp_path / 'audit.db')
+        AuditLogger(db_path).close()
+
+        connection = sqlite3.connect(db_path)
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        connection.close()
+
+    def test_drop_policy_when_full(self, tmp_path):
+        """Records are dropped instead of blocking when the queue is full"""
+        audit_logger = _SlowAuditLogger(str(tmp_path / 'audit.db'), queue_size=2,
+                                        full_policy='drop')
+
+        results = [audit_logger.record(['fever'], 'Cold', 'v1', 1.0) for _ in range(10)]
+        audit_logger.release.set()
+        audit_logger.close()
+
+        assert not all(results)
+        assert audit_logger.get_stats()['dropped'] == results.count(False)
+
+    def test_block_policy_times_out(self, tmp_path):
+        """The block policy waits for space, then drops after the timeout"""
+        audit_logger = _SlowAuditLogger(str(tmp_path / 'audit.db'), queue_size=1,
+                                        full_policy='block', block_timeout=0.01)
+
+        results = [audit_logger.record(['fever'], 'Cold', 'v1', 1.0) for _ in range(4)]
+        audit_logger.release.set()
+        audit_logger.close()
+
+        assert results.count(False) == audit_logger.get_stats()['dropped'] > 0
+
+    def test_invalid_policy(self, tmp_path):
+        """Unknown queue policies are rejected"""
+        with pytest.raises(ValueError):
+            AuditLogger(str(tmp_path / 'audit.db'), full_policy='retry')
+
+class TestPredictionAudit:
+    """Test that PredictionService records predictions"""
+
+    def test_prediction_is_audited(self):
+        """A successful prediction is queued with its model version and latency"""
+        config = MagicMock()
+        config.MODEL_FORMAT = 'joblib'
+        config.MODEL_PATH = 'models/forest-v2.joblib'
+        config.MAX_SYMPTOMS = 17
+        config.MIN_SYMPTOMS = 1
+
+        data_service = MagicMock()
+        data_service.get_symptom_weights.return_value = {'fever': 1}
+        data_service.get_disease_descriptions.return_value = {}
+        data_service.get_disease_precautions.return_value = {}
+        audit_logger = MagicMock()
+
+        with patch('services.prediction_service.load') as mock_load:
+            mock_load.return_value.predict.return_value = ['Cold']
+            prediction_service = PredictionService(config, data_service, audit_logger)
+            prediction_service.predict_disease(['fever'])
+
+        symptoms, disease, model_version, latency_ms = audit_logger.record.call_args[0]
+        assert symptoms == ['fever']
+        assert disease == 'Cold'
+        assert model_version == 'forest-v2'
+        assert latency_ms >= 0
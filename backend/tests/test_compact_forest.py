@@ -0,0 +1,88 @@
+"""
+Tests for the compact quantized forest format
+"""
+import pytest
+import numpy as np
+from unittest.mock import patch, MagicMock
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.tree import DecisionTreeClassifier
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.compact_forest import CompactForest, validate_equivalence
+from services.prediction_service import PredictionService
+
+class TestCompactForest:
+    """Test CompactForest conversion and inference"""
+
+    @pytest.mark.parametrize('leaf_mode,min_agreement', [('proba', 1.0), ('label', 0.95)])
+    def test_round_trip_predictions_match(self, forest, training_data, tmp_path,
+                                          leaf_mode, min_agreement):
+        """Saved and reloaded forest predicts like the original (hard voting may differ slightly)"""
+        X, _ = training_data
+        path = str(tmp_path / 'forest.npz')
+        CompactForest.from_estimator(forest, leaf_mode=leaf_mode).save(path)
+        compact = CompactForest.load(path)
+
+        result = validate_equivalence(forest, compact, X)
+
+        assert result['rows'] == len(X)
+        assert result['agreement'] >= min_agreement
+        assert compact.n_estimators == 25
+
+    def test_proba_mode_matches_probabilities(self, forest, training_data):
+        """Quantized leaf distributions stay close to sklearn probabilities"""
+        X, _ = training_data
+        compact = CompactForest.from_estimator(forest)
+
+        np.testing.assert_allclose(compact.predict_proba(X), forest.predict_proba(X), atol=0.01)
+        assert (compact.predict(X) == forest.predict(X)).all()
+
+    def test_arrays_use_narrow_dtypes(self, forest):
+        """Nodes are stored in byte-sized and int16 arrays"""
+        compact = CompactForest.from_estimator(forest)
+
+        assert compact.feature.dtype == np.uint8
+        assert compact.threshold.dtype == np.uint8
+        assert compact.children_left.dtype == np.int16
+        assert compact.leaf_values.dtype == np.uint8
+
+    def test_single_decision_tree(self, training_data):
+        """A single decision tree converts exactly"""
+        X, y = training_data
+        tree = DecisionTreeClassifier(max_depth=6, random_state=0).fit(X, y)
+        compact = CompactForest.from_estimator(tree, leaf_mode='label')
+
+        assert (compact.predict(X) == tree.predict(X)).all()
+
+    def test_unfitted_model_rejected(self):
+        """Unfitted estimators cannot be converted"""
+        with pytest.raises(ValueError):
+            CompactForest.from_estimator(RandomForestClassifier())
+
+    def test_non_integer_input_rejected(self, forest):
+        """Fractional inputs would break the floored thresholds"""
+        compact = CompactForest.from_estimator(forest)
+        with pytest.raises(ValueError):
+            compact.predict([[0.5] * 17])
+
+class TestCompactModelLoading:
+    """Test PredictionService with the compact model format"""
+
+    def test_load_compact_model(self, forest, tmp_path):
+        """MODEL_FORMAT='compact' loads the npz forest instead of joblib"""
+        path = str(tmp_path / 'forest.npz')
+        CompactForest.from_estimator(forest).save(path)
+
+        config = MagicMock()
+        config.MODEL_FORMAT = 'compact'
+        config.COMPACT_MODEL_PATH = path
+        config.MODEL_TIER = None
+        config.MAX_SYMPTOMS = 17
+
+        with patch('services.prediction_service.load') as mock_load:
+            prediction_service = PredictionService(config, MagicMock())
+
+        mock_load.assert_not_called()
+        assert isinstance(prediction_service.model, CompactForest)
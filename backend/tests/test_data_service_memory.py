@@ -0,0 +1,130 @@
+"""
+Tests for the data service serving mode and the memory debug endpoint
+"""
+import pytest
+import json
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from services.data_service import DataService, deep_sizeof
+
+ADMIN_HEADERS = {'X-Admin-Token': 'secret'}
+
+@pytest.fixture(scope='module')
+def full_service():
+    return DataService(Config)
+
+@pytest.fixture(scope='module')
+def serving_service():
+    return DataService(Config).to_serving_mode()
+
+class TestServingMode:
+    """Test the compact structures that replace the DataFrames"""
+
+    def test_frames_are_released(self, serving_service):
+        """The pandas frames are dropped once serving mode is on"""
+        assert serving_service.serving_mode
+        assert serving_service.df is None
+        assert serving_service.symptom_severity is None
+        assert serving_service.descriptions is None
+        assert serving_service.precaution is None
+
+    def test_getters_match_full_mode(self, full_service, serving_service):
+        """Every getter returns the same data in both modes"""
+        assert list(serving_service.get_symptoms_list()) == list(full_service.get_symptoms_list())
+        assert serving_service.get_diseases() == full_service.get_diseases()
+        assert serving_service.get_symptom_weights() == full_service.get_symptom_weights()
+        assert serving_service.get_disease_descriptions() == full_service.get_disease_descriptions()
+        assert ({disease: list(precautions) for disease, precautions in
+                 serving_service.get_disease_precautions().items()}
+                == full_service.get_disease_precautions())
+
+        full_features, full_labels = full_service.get_training_data()
+        features, labels = serving_service.get_training_data()
+        np.testing.assert_array_equal(features, full_features)
+        np.testing.assert_array_equal(labels, full_labels)
+
+    def test_compact_dtypes(self, serving_service):
+        """Codes, features and weights use the narrowest integer types"""
+        assert serving_service.label_codes.dtype == np.uint8
+        assert serving_service.features.dtype == np.uint8
+        assert serving_service.weight_table.dtype == np.int8
+        assert len(serving_service.weight_table) == len(serving_service.get_symptoms_list())
+
+    def test_strings_are_interned(self, serving_service):
+        """Disease names are shared between the label table and the lookup maps"""
+        keys = {key: key for key in serving_service.get_disease_descriptions()}
+        shared = [disease for disease in serving_service.disease_labels if disease in keys]
+        assert shared
+        assert all(keys[disease] is disease for disease in shared)
+
+    def test_to_serving_mode_is_idempotent(self, serving_service):
+        """A second call leaves the service unchanged"""
+        codes = serving_service.label_codes
+        assert serving_service.to_serving_mode() is serving_service
+        assert serving_service.label_codes is codes
+
+    def test_memory_is_smaller(self, full_service, serving_service):
+        """Serving mode holds a fraction of the full-mode footprint"""
+        full_service.get_disease_descriptions()
+        full_service.get_disease_precautions()
+        full = sum(full_service.get_memory_usage().values())
+        serving = sum(serving_service.get_memory_usage().values())
+        assert serving < full / 2
+
+class TestDeepSizeof:
+    """Test the deep size helper"""
+
+    def test_counts_nested_items_once(self):
+        """Shared objects are only counted the first time they are seen"""
+        item = 'x' * 1000
+        assert deep_sizeof([item, item]) < deep_sizeof([item]) + 100
+        assert deep_sizeof({'a': [item]}) > 1000
+
+    def test_pandas_and_numpy(self):
+        """Frames use their deep memory usage, arrays their buffer size"""
+        frame = pd.DataFrame({'a': ['x' * 100] * 10})
+        assert deep_sizeof(frame) == frame.memory_usage(deep=True).sum()
+        assert deep_sizeof(np.zeros(1000, dtype=np.uint8)) >= 1000
+        assert deep_sizeof(None) == 0
+
+class TestMemoryEndpoint:
+    """Test GET /debug/memory"""
+
+    def test_disabled_by_default(self, app_factory):
+        """The endpoint is not registered unless enabled"""
+        app = app_factory()
+        response = app.test_client().get('/debug/memory')
+        assert response.status_code == 404
+
+    def test_reports_structures_and_rss(self, app_factory):
+        """Structure sizes, their total and the process RSS are reported"""
+        app = app_factory(MEMORY_DEBUG_ENABLED=True, ADMIN_TOKEN='secret')
+        response = app.test_client().get('/debug/memory', headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['serving_mode'] is True
+        assert data['structures']['df'] == 0
+        assert data['total_bytes'] == sum(data['structures'].values())
+        assert data['rss_bytes'] > 0
+
+    def test_requires_admin_token(self, app_factory):
+        """The configured admin token must be sent"""
+        client = app_factory(MEMORY_DEBUG_ENABLED=True, ADMIN_TOKEN='secret').test_client()
+        assert client.get('/debug/memory').status_code == 403
+        assert client.get('/debug/memory', headers=ADMIN_HEADERS).status_code == 200
+
+    def test_not_registered_without_admin_token(self, app_factory):
+        """Enabling the endpoint without an admin token does not expose it"""
+        client = app_factory(MEMORY_DEBUG_ENABLED=True, ADMIN_TOKEN=None).test_client()
+        assert client.get('/debug/memory').status_code == 404
+
+    def test_diseases_in_serving_mode(self, app_factory):
+        """GET /diseases works without the dataset frame"""
+        response = app_factory().test_client().get('/diseases')
+        assert response.status_code == 200
+        assert json.loads(response.data)['count'] > 0
@@ -0,0 +1,165 @@
+"""
+Tests for the streaming drift monitor
+"""
+import pytest
+import json
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from services.drift_monitor import (
+    REQUEST_CONTENT_KEYS, CountMinSketch, DriftMonitor, ReservoirSample, jensen_shannon
+)
+
+@pytest.fixture
+def monitor():
+    """Monitor whose baseline favours fever and Cold"""
+    return DriftMonitor(
+        vocabulary=['fever', 'cough', 'headache'],
+        diseases=['Cold', 'Flu'],
+        baseline_symptoms=np.array([50, 30, 20, 0]),
+        baseline_diseases=np.array([70, 30]),
+        baseline_lengths=np.array([0, 10, 60, 30, 0]),
+        max_symptoms=3,
+        min_requests=10,
+    )
+
+class TestSketches:
+    """Test the fixed-size sketches"""
+
+    def test_jensen_shannon_bounds(self):
+        """Identical distributions score 0, disjoint ones score 1"""
+        assert jensen_shannon([1, 2, 3], [2, 4, 6]) == pytest.approx(0, abs=1e-6)
+        assert jensen_shannon([1, 0], [0, 1]) == pytest.approx(1, abs=1e-6)
+
+    def test_count_min_never_underestimates(self):
+        """Estimates are upper bounds of the true counts"""
+        sketch = CountMinSketch(width=16, depth=3)
+        for i in range(100):
+            sketch.add(f"symptom_{i % 10}")
+        assert all(sketch.estimate(f"symptom_{i}") >= 10 for i in range(10))
+
+    def test_reservoir_has_fixed_size(self):
+        """The reservoir keeps at most ``size`` items"""
+        reservoir = ReservoirSample(size=5, seed=0)
+        for i in range(1000):
+            reservoir.add(i)
+        assert len(reservoir.items) == 5
+        assert reservoir.seen == 1000
+
+    def test_count_min_tracks_most_common(self):
+        """The most frequent items are listed with their estimates"""
+        sketch = CountMinSketch(width=64, depth=3, top_k=3)
+        for i in range(200):
+            sketch.add(f"rare_{i}")
+            if i % 2 == 0:
+                sketch.add('frequent')
+            if i % 4 == 0:
+                sketch.add('common')
+        top = sketch.most_common(2)
+        assert [name for name, _ in top] == ['frequent', 'common']
+        assert top[0][1] >= 100
+        assert len(sketch.top) == 3
+
+class TestDriftMonitor:
+    """Test DriftMonitor updates and scores"""
+
+    def test_matching_traffic_not_drifted(self, monitor):
+        """Traffic shaped like the baseline scores below the threshold"""
+        for _ in range(5):
+            monitor.observe(['fever', 'cough'], 'Cold')
+            monitor.observe(['fever', 'headache'], 'Cold')
+            monitor.observe(['fever', 'cough', 'headache'], 'Flu')
+        report = monitor.compute_report()
+
+        assert report['requests'] == 15
+        assert report['drifted'] == []
+        assert report['scores']['symptoms'] < monitor.threshold
+
+    def test_shifted_traffic_drifted(self, monitor):
+        """Unknown symptoms and a different label mix are flagged"""
+        for _ in range(20):
+            monitor.observe(['rash', 'itching'], 'Flu')
+        report = monitor.compute_report(include_requests=True)
+
+        assert 'symptoms' in report['drifted']
+        assert 'predicted_disease' in report['drifted']
+        assert report['unknown_symptom_rate'] == 1.0
+        assert report['top_symptom_shifts'][0]['name'] == '<unknown>'
+        assert monitor.estimate_unknown('rash') >= 20
+        assert {entry['name'] for entry in report['top_unknown_symptoms']} == {'rash', 'itching'}
+
+    def test_request_content_only_on_request(self, monitor):
+        """Sampled requests and unknown symptom strings are left out by default"""
+        monitor.observe(['fever', 'patient 1234'], 'Cold')
+        for report in (monitor.compute_report(), monitor.get_report()):
+            assert not set(REQUEST_CONTENT_KEYS) & set(report)
+            assert 'patient 1234' not in json.dumps(report)
+        assert monitor.get_report(include_requests=True)['sample'] == [['fever', 'patient 1234']]
+
+    def test_few_requests_not_scored(self, monitor):
+        """Below min_requests nothing is scored or flagged, however skewed the traffic"""
+        for _ in range(monitor.min_requests - 1):
+            monitor.observe(['rash'], 'Flu')
+        report = monitor.compute_report()
+
+        assert report['scores'] == {}
+        assert report['drifted'] == []
+        assert report['unknown_symptom_rate'] == 1.0
+
+    def test_memory_is_constant(self, monitor):
+        """Sketch sizes do not grow with the number of requests"""
+        for i in range(2000):
+            monitor.observe([f"new_symptom_{i}"], 'Cold')
+        assert monitor.symptom_counts.shape == (4,)
+        assert len(monitor.reservoir.items) <= monitor.reservoir.size
+
+    def test_from_config_baseline(self):
+        """The baseline is computed from the training dataset"""
+        monitor = DriftMonitor.from_config(Config, ['itching', 'skin_rash'])
+
+        assert monitor.baseline_diseases.sum() == 4920
+        assert len(monitor.diseases) == 41
+        assert monitor.baseline_symptoms[0] > 0
+
+class TestDriftEndpoint:
+    """Test the /drift endpoint"""
+
+    @pytest.fixture(scope='class')
+    @classmethod
+    def client(cls, app_factory):
+        """App serving a small fitted model with drift monitoring on"""
+        return app_factory(DRIFT_ENABLED=True, DRIFT_MIN_REQUESTS=1,
+                           ADMIN_TOKEN='secret').test_client()
+
+    def test_drift_report_after_predictions(self, client):
+        """Predictions are observed and reported with drift scores"""
+        response = client.post('/predict',
+            data=json.dumps({'symptoms': ['itching', 'skin_rash']}),
+            content_type='application/json'
+        )
+        assert response.status_code == 200
+
+        response = client.get('/drift?refresh=1')
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['requests'] == 1
+        assert 'symptoms' in data['scores']
+
+    def test_public_report_has_no_request_content(self, client):
+        """Without the admin token only aggregates are returned"""
+        private = 'HIV positive patient 1234'
+        response = client.post('/predict', json={'symptoms': ['itching', private]})
+        assert response.status_code == 200
+
+        response = client.get('/drift?refresh=1')
+        assert response.status_code == 200
+        assert private not in response.get_data(as_text=True)
+        data = json.loads(response.data)
+        assert not set(REQUEST_CONTENT_KEYS) & set(data)
+        assert data['unknown_symptom_rate'] > 0
+
+        response = client.get('/drift', headers={'X-Admin-Token': 'secret'})
+        assert ['itching', private] in json.loads(response.data)['sample']
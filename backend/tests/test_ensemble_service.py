@@ -0,0 +1,118 @@
+"""
+Tests for ensemble serving
+"""
+import pytest
+import time
+import numpy as np
+from unittest.mock import MagicMock
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.ensemble_service import EnsemblePredictor
+from services.prediction_service import PredictionService
+
+class _FixedModel:
+    """Model returning a fixed label (and optionally probabilities) after a delay"""
+
+    def __init__(self, label, classes=('Cold', 'Flu'), proba=None, delay=0.0):
+        self.label = label
+        self.classes_ = np.array(classes)
+        self.delay = delay
+        if proba is not None:
+            self.predict_proba = lambda X: np.tile(proba, (len(X), 1))
+
+    def predict(self, X):
+        time.sleep(self.delay)
+        return np.array([self.label] * len(X))
+
+class TestEnsemblePredictor:
+    """Test EnsemblePredictor combination and budgets"""
+
+    def test_majority_vote(self):
+        """The most common label wins"""
+        ensemble = EnsemblePredictor([
+            {"name": "a", "model": _FixedModel('Flu')},
+            {"name": "b", "model": _FixedModel('Cold')},
+            {"name": "c", "model": _FixedModel('Cold')},
+        ])
+        outcome = ensemble.predict([[1] * 17])
+
+        assert list(outcome["predictions"]) == ['Cold']
+        assert outcome["partial"] is False
+        assert outcome["used"] == ['a', 'b', 'c']
+
+    def test_vote_tie_goes_to_first_model(self):
+        """With one vote each, the first configured model wins"""
+        ensemble = EnsemblePredictor([
+            {"name": "a", "model": _FixedModel('Flu')},
+            {"name": "b", "model": _FixedModel('Cold')},
+        ])
+        assert list(ensemble.predict([[1] * 17])["predictions"]) == ['Flu']
+
+    def test_probability_averaging(self):
+        """Probabilities are averaged; models without predict_proba vote one-hot"""
+        ensemble = EnsemblePredictor([
+            {"name": "a", "model": _FixedModel('Cold', proba=[0.6, 0.4])},
+            {"name": "b", "model": _FixedModel('Cold', proba=[0.45, 0.55])},
+            {"name": "c", "model": _FixedModel('Flu')},
+        ], method='proba')
+
+        # Cold: 0.6 + 0.45 = 1.05, Flu: 0.4 + 0.55 + 1 = 1.95
+        assert list(ensemble.predict([[1] * 17])["predictions"]) == ['Flu']
+
+    def test_slow_model_skipped(self):
+        """A model over its budget is left out and the result marked partial"""
+        ensemble = EnsemblePredictor([
+            {"name": "fast", "model": _FixedModel('Cold'), "budget_ms": 1000},
+            {"name": "slow", "model": _FixedModel('Flu', delay=0.5), "budget_ms": 20},
+        ])
+        outcome = ensemble.predict([[1] * 17])
+
+        assert list(outcome["predictions"]) == ['Cold']
+        assert outcome["partial"] is True
+        assert outcome["skipped"] == ['slow']
+
+        metrics = ensemble.get_metrics()
+        assert metrics["slow"]["timeouts"] == 1
+        assert metrics["fast"]["calls"] == 1
+        assert metrics["fast"]["mean_ms"] is not None
+        ensemble.shutdown()
+
+    def test_all_models_skipped(self):
+        """An error is raised when no model finishes in time"""
+        ensemble = EnsemblePredictor([
+            {"name": "slow", "model": _FixedModel('Flu', delay=0.2), "budget_ms": 1},
+        ])
+        with pytest.raises(RuntimeError):
+            ensemble.predict([[1] * 17])
+
+    def test_invalid_method(self):
+        """Unknown combination methods are rejected"""
+        with pytest.raises(ValueError):
+            EnsemblePredictor([{"name": "a", "model": _FixedModel('Cold')}], method='stack')
+
+class TestEnsemblePrediction:
+    """Test PredictionService serving through an ensemble"""
+
+    def test_predict_disease_with_ensemble(self):
+        """The ensemble replaces the single model and reports the models used"""
+        config = MagicMock()
+        config.MAX_SYMPTOMS = 17
+        config.MIN_SYMPTOMS = 1
+        data_service = MagicMock()
+        data_service.get_symptom_weights.return_value = {'fever': 1}
+        data_service.get_disease_descriptions.return_value = {'Cold': 'Cold description'}
+        data_service.get_disease_precautions.return_value = {'Cold': ['Rest']}
+        ensemble = EnsemblePredictor([
+            {"name": "forest", "model": _FixedModel('Cold')},
+            {"name": "svm", "model": _FixedModel('Cold')},
+        ])
+
+        prediction_service = PredictionService(config, data_service, ensemble=ensemble)
+        result = prediction_service.predict_disease(['fever'])
+
+        assert prediction_service.model_version == 'ensemble:forest+svm'
+        assert result['disease'] == 'Cold'
+        assert result['partial'] is False
+        assert result['models'] == ['forest', 'svm']
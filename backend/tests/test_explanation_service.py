@@ -0,0 +1,131 @@
+"""
+Tests for decision path explanations
+"""
+import pytest
+import json
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+from unittest.mock import MagicMock
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.compact_forest import CompactForest
+from services.explanation_service import TreeExplainer
+from services.prediction_service import PredictionService
+
+class TestTreeExplainer:
+    """Test path attribution on sklearn trees"""
+
+    def test_probabilities_match_model(self, forest, training_data):
+        """The explainer's leaf distributions reproduce predict_proba"""
+        X, _ = training_data
+        explanation = TreeExplainer(forest).explain(X)
+
+        np.testing.assert_allclose(explanation['proba'], forest.predict_proba(X), atol=1e-6)
+        assert (forest.classes_[explanation['targets']] == forest.predict(X)).all()
+
+    def test_contributions_add_up(self, forest, training_data):
+        """Bias plus contributions equals the explained class probability"""
+        X, _ = training_data
+        explanation = TreeExplainer(forest).explain(X[:50], targets=np.full(50, 1))
+
+        total = explanation['bias'] + explanation['contributions'].sum(axis=1)
+        np.testing.assert_allclose(total, explanation['proba'][:, 1], atol=1e-6)
+        assert explanation['contributions'].shape == (50, 17)
+
+    def test_only_split_features_contribute(self, training_data):
+        """Features the trees never split on get no credit"""
+        X, y = training_data
+        tree = DecisionTreeClassifier(max_depth=3, random_state=0).fit(X[:, :4], y)
+        contributions = TreeExplainer(tree).explain(X[:, :4])['contributions']
+
+        unused = np.setdiff1d(np.arange(4), tree.tree_.feature[tree.tree_.feature >= 0])
+        assert (contributions[:, unused] == 0).all()
+
+    def test_batch_matches_single_rows(self, forest, training_data):
+        """Rows are explained independently of the batch they are in"""
+        X, _ = training_data
+        explainer = TreeExplainer(forest)
+        batch = explainer.explain(X[:10])['contributions']
+        single = np.vstack([explainer.explain(X[i:i + 1])['contributions'] for i in range(10)])
+
+        np.testing.assert_allclose(batch, single)
+
+    def test_rejects_wrong_shape(self, forest):
+        """Inputs must have the model's feature count"""
+        with pytest.raises(ValueError):
+            TreeExplainer(forest).explain(np.zeros((1, 5)))
+
+class TestPredictionServiceExplain:
+    """Test the explanation mode of PredictionService"""
+
+    @pytest.fixture
+    def service(self, forest, tmp_path):
+        from joblib import dump
+        path = str(tmp_path / 'forest.joblib')
+        dump(forest, path)
+        config = MagicMock()
+        config.MODEL_PATH = path
+        config.MODEL_FORMAT = 'joblib'
+        config.MODEL_TIER = None
+        config.EXPLANATIONS_ENABLED = True
+        config.MAX_SYMPTOMS = 17
+        config.MIN_SYMPTOMS = 1
+        data_service = MagicMock()
+        data_service.get_symptom_weights.return_value = {'fever': 3, 'cough': 5, 'rash': 7}
+        data_service.get_disease_descriptions.return_value = {}
+        data_service.get_disease_precautions.return_value = {}
+        return PredictionService(config, data_service)
+
+    def test_contributions_named_by_symptom(self, service):
+        """Contributions are keyed by the symptoms the caller sent"""
+        result = service.predict_disease(['fever', 'cough', 'rash'], explain=True)
+        explanation = result['explanation']
+
+        assert sorted(item['symptom'] for item in explanation['contributions']) == \
+            ['cough', 'fever', 'rash']
+        values = [item['contribution'] for item in explanation['contributions']]
+        assert values == sorted(values, reverse=True)
+        total = explanation['base_value'] + sum(values) + explanation['empty_slots']
+        assert total == pytest.approx(explanation['probability'])
+
+    def test_explanation_is_opt_in(self, service):
+        """Plain predictions carry no explanation"""
+        assert 'explanation' not in service.predict_disease(['fever'])
+
+    def test_unavailable_for_compact_models(self, service, forest):
+        """Compact models keep no internal node values, so explain is rejected"""
+        service.model = CompactForest.from_estimator(forest)
+        service.explainer = None
+        service._build_explainer()
+
+        assert service.explainer is None
+        with pytest.raises(ValueError):
+            service.predict_disease(['fever'], explain=True)
+
+class TestExplainEndpoint:
+    """Test the explain flag of POST /predict"""
+
+    def test_predict_with_explain(self, app_factory):
+        """The response includes per-symptom contributions"""
+        client = app_factory(EXPLANATIONS_ENABLED=True).test_client()
+        response = client.post('/predict', json={'symptoms': ['itching', 'skin_rash'],
+                                                 'explain': True})
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert sorted(item['symptom'] for item in data['explanation']['contributions']) == \
+            ['itching', 'skin_rash']
+        assert data['explanation']['method'] == 'saabas'
+
+    def test_explanations_off_by_default(self, app_factory):
+        """Without EXPLANATIONS_ENABLED no explainer is built and explain is rejected"""
+        client = app_factory().test_client()
+        response = client.post('/predict', json={'symptoms': ['itching'], 'explain': True})
+        assert response.status_code == 400
+
+    def test_explain_must_be_boolean(self, app_factory):
+        """Non-boolean explain values are rejected"""
+        client = app_factory().test_client()
+        response = client.post('/predict', json={'symptoms': ['itching'], 'explain': 'yes'})
+        assert response.status_code == 400
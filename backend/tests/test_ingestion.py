@@ -0,0 +1,229 @@
+"""
+Tests for incremental dataset ingestion
+"""
+import pytest
+import json
+import os
+import sys
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from services.data_service import DataService, encode_records
+from services.segment_store import SegmentStore
+from tools import ingest
+
+WEIGHTS = {'itching': 1, 'skin_rash': 3, 'cough': 4}
+ADMIN_HEADERS = {'X-Admin-Token': 'secret'}
+
+def make_records(disease='Cold', count=3):
+    return [{'disease': disease, 'symptoms': ['itching', 'cough'][:1 + i % 2]} for i in range(count)]
+
+def append(store, records):
+    return store.append(*encode_records(records, WEIGHTS, 17))
+
+class TestEncodeRecords:
+    """Test encoding of raw records"""
+
+    def test_encodes_like_dataset_rows(self):
+        """Symptoms become weights in their column; the rest is zero"""
+        features, labels, names = encode_records(
+            [{'disease': ' Flu ', 'symptoms': [' skin_rash', 'cough']}], WEIGHTS, 5)
+        assert features.dtype == np.uint8
+        assert features.tolist() == [[3, 4, 0, 0, 0]]
+        assert labels.tolist() == ['Flu']
+        assert names.tolist() == [['skin_rash', 'cough', '', '', '']]
+
+    @pytest.mark.parametrize('record', [
+        {'disease': '', 'symptoms': ['cough']},
+        {'disease': 'Flu', 'symptoms': []},
+        {'disease': 'Flu', 'symptoms': ['not_a_symptom']},
+        {'disease': 'Flu', 'symptoms': ['cough'] * 6},
+        {'disease': 'Flu', 'symptoms': [['cough']]},
+        {'disease': 'Flu', 'symptoms': [None]},
+        'Flu',
+    ])
+    def test_rejects_invalid_records(self, record):
+        """Malformed records and unknown symptoms are rejected"""
+        with pytest.raises(ValueError):
+            encode_records([record], WEIGHTS, 5)
+
+class TestSegmentStore:
+    """Test appending, reading and compacting segments"""
+
+    def test_read_only_new_rows(self, tmp_path):
+        """Readers get the rows appended after the sequence they have applied"""
+        store = SegmentStore(str(tmp_path / 'segments'))
+        assert store.read_since(0)[2] == 0
+        assert append(store, make_records(count=2)) == 1
+        assert append(store, make_records('Flu', count=3)) == 2
+
+        features, labels, last = store.read_since(1)
+        assert last == 2
+        assert labels.tolist() == ['Flu'] * 3
+        assert features.shape == (3, 17)
+        assert len(store.read_since(0)[1]) == 5
+
+    def test_compaction_keeps_rows_and_sequences(self, tmp_path):
+        """A compacted store reads the same rows, including partial reads"""
+        store = SegmentStore(str(tmp_path))
+        for disease in ('Cold', 'Flu', 'Malaria'):
+            append(store, make_records(disease, count=2))
+        before = store.read_since(1)
+
+        assert store.compact(min_segments=3) is not None
+        assert len(store.segments()) == 1
+        after = store.read_since(1)
+        np.testing.assert_array_equal(after[0], before[0])
+        np.testing.assert_array_equal(after[1], before[1])
+        assert after[2] == before[2] == 3
+        assert append(store, make_records()) == 4
+
+    def test_compaction_waits_for_enough_segments(self, tmp_path):
+        """Nothing is merged below min_segments"""
+        store = SegmentStore(str(tmp_path))
+        append(store, make_records())
+        append(store, make_records())
+        assert store.compact(min_segments=3) is None
+        assert len(store.segments()) == 2
+
+    def test_covered_segments_are_ignored(self, tmp_path):
+        """Old segments left next to their compacted copy are not read twice"""
+        store = SegmentStore(str(tmp_path))
+        append(store, make_records(count=1))
+        append(store, make_records(count=1))
+        left_behind = store.segments()[0][2]
+        with open(left_behind, 'rb') as f:
+            content = f.read()
+        store.compact()
+        with open(left_behind, 'wb') as f:
+            f.write(content)
+
+        assert len(store.read_since(0)[1]) == 2
+
+    def test_missing_directory_is_empty(self, tmp_path):
+        """Following a store that was never written creates nothing"""
+        store = SegmentStore(str(tmp_path / 'absent'))
+        assert store.segments() == []
+        assert not os.path.exists(tmp_path / 'absent')
+
+@pytest.fixture(scope='module')
+def base_counts():
+    service = DataService(Config)
+    return service.get_record_count(), service.get_diseases()
+
+class TestDataServiceIngestion:
+    """Test applying segments to a loaded data service"""
+
+    def test_encoding_matches_dataset_preprocessing(self):
+        """Ingested copies of dataset rows encode exactly like the originals"""
+        records = ingest.read_records(Config.DATASET_PATH)[:200]
+        service = DataService(Config)
+        features, labels, _ = service.encode_records(records)
+        expected_features, expected_labels = service.get_training_data()
+
+        np.testing.assert_array_equal(features, expected_features[:200])
+        np.testing.assert_array_equal(labels, expected_labels[:200])
+
+    @pytest.mark.parametrize('serving_mode', [False, True])
+    def test_ingest_updates_derived_structures(self, tmp_path, base_counts, serving_mode):
+        """New rows and diseases appear without reloading the dataset"""
+        records, diseases = base_counts
+        service = DataService(Config)
+        if serving_mode:
+            service.to_serving_mode()
+        service.attach_segment_store(SegmentStore(str(tmp_path)))
+
+        result = service.ingest([{'disease': 'New disease', 'symptoms': ['itching', 'cough']},
+                                 {'disease': diseases[0], 'symptoms': ['skin_rash']}])
+
+        assert result == {'segment': 1, 'ingested': 2, 'records': records + 2}
+        assert service.get_diseases() == diseases + ['New disease']
+        features, labels = service.get_training_data()
+        assert labels[-2:].tolist() == ['New disease', diseases[0]]
+        weights = service.get_symptom_weights()
+        assert features[-2, :2].tolist() == [weights['itching'], weights['cough']]
+        assert features[-1, 1:].sum() == 0
+
+    def test_other_processes_pick_up_segments(self, tmp_path, base_counts):
+        """A second service sees segments written elsewhere on refresh"""
+        records, _ = base_counts
+        writer = DataService(Config).to_serving_mode()
+        writer.attach_segment_store(SegmentStore(str(tmp_path)))
+        reader = DataService(Config).to_serving_mode()
+        reader.attach_segment_store(SegmentStore(str(tmp_path)))
+
+        writer.ingest(make_records(count=4))
+        writer.segment_store.compact()
+        writer.ingest(make_records(count=1))
+
+        assert reader.refresh_segments() == 5
+        assert reader.refresh_segments() == 0
+        assert reader.get_record_count() == records + 5
+
+    def test_existing_segments_apply_at_startup(self, tmp_path, base_counts):
+        """Attaching a store applies what was ingested before the restart"""
+        records, _ = base_counts
+        append(SegmentStore(str(tmp_path)), make_records(count=3))
+        service = DataService(Config)
+        assert service.attach_segment_store(SegmentStore(str(tmp_path))) == 3
+        assert service.get_record_count() == records + 3
+
+class TestIngestEndpoint:
+    """Test POST /ingest"""
+
+    @pytest.fixture
+    def client(self, app_factory, tmp_path):
+        return app_factory(DATASET_SEGMENTS_DIR=str(tmp_path), INGEST_ENABLED=True,
+                           ADMIN_TOKEN='secret', SEGMENT_REFRESH_INTERVAL=0,
+                           SEGMENT_COMPACT_INTERVAL=0).test_client()
+
+    def test_ingest_records(self, client):
+        """Records are appended and show up in /diseases"""
+        response = client.post('/ingest', headers=ADMIN_HEADERS, json={
+            'records': [{'disease': 'Brand new', 'symptoms': ['itching']}]})
+        assert response.status_code == 201
+        assert json.loads(response.data)['segment'] == 1
+        diseases = json.loads(client.get('/diseases').data)['diseases']
+        assert diseases[-1] == 'Brand new'
+
+    def test_requires_admin_token(self, client):
+        response = client.post('/ingest', json={'records': make_records()})
+        assert response.status_code == 403
+
+    def test_rejects_invalid_records(self, client):
+        response = client.post('/ingest', headers=ADMIN_HEADERS, json={
+            'records': [{'disease': 'Flu', 'symptoms': ['not_a_symptom']}]})
+        assert response.status_code == 400
+        assert 'not_a_symptom' in json.loads(response.data)['message']
+        response = client.post('/ingest', headers=ADMIN_HEADERS, json={
+            'records': [{'disease': 'Flu', 'symptoms': [['itching']]}]})
+        assert response.status_code == 400
+
+    def test_disabled_by_default(self, app_factory, tmp_path):
+        client = app_factory(DATASET_SEGMENTS_DIR=str(tmp_path)).test_client()
+        assert client.post('/ingest', json={'records': make_records()}).status_code == 404
+
+    def test_not_registered_without_admin_token(self, app_factory, tmp_path):
+        """A write endpoint is never exposed without an admin token"""
+        client = app_factory(DATASET_SEGMENTS_DIR=str(tmp_path), INGEST_ENABLED=True,
+                             ADMIN_TOKEN=None, SEGMENT_REFRESH_INTERVAL=0,
+                             SEGMENT_COMPACT_INTERVAL=0).test_client()
+        assert client.post('/ingest', json={'records': make_records()}).status_code == 404
+
+class TestIngestCli:
+    """Test the ingestion command line tool"""
+
+    def test_ingest_csv_and_jsonl(self, tmp_path, capsys):
+        csv_path = tmp_path / 'cases.csv'
+        csv_path.write_text("Disease,Symptom_1,Symptom_2\nFlu, itching, cough\nCold,cough,\n")
+        jsonl_path = tmp_path / 'cases.jsonl'
+        jsonl_path.write_text(json.dumps({'disease': 'Flu', 'symptoms': ['itching']}) + "\n")
+        settings = type('IngestConfig', (Config,), {'DATASET_SEGMENTS_DIR': str(tmp_path / 's')})
+
+        store = SegmentStore(settings.DATASET_SEGMENTS_DIR)
+        results = ingest.ingest_files([str(csv_path), str(jsonl_path)], store, settings)
+
+        assert [result['records'] for result in results] == [2, 1]
+        assert store.read_since(0)[1].tolist() == ['Flu', 'Cold', 'Flu']
+        assert ingest.status(store)['last_sequence'] == 2
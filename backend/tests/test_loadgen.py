@@ -0,0 +1,125 @@
+"""
+Tests for the open-loop load generator
+"""
+import pytest
+import time
+from collections import Counter
+from flask import Flask, jsonify
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from services.audit_service import AuditLogger
+from tools.loadgen import (
+    FlaskTarget, arrival_schedule, build_requests, compare, load_replay,
+    run_open_loop, summarize
+)
+
+class TestRequestMix:
+    """Test request mix generation"""
+
+    def test_dataset_mix_uses_dataset_rows(self):
+        """Dataset rows become stripped symptom lists"""
+        requests = build_requests(Config.DATASET_PATH, [], 50, mix='dataset')
+        assert len(requests) == 50
+        assert all(requests) and all(symptom == symptom.strip()
+                                     for request in requests for symptom in request)
+
+    def test_skewed_mix_is_concentrated(self):
+        """A few rows dominate the skewed mix"""
+        requests = build_requests(Config.DATASET_PATH, [], 2000, mix='skewed', zipf_exponent=1.5)
+        top = Counter(tuple(request) for request in requests).most_common(1)[0][1]
+        assert top > 2000 * 0.2
+
+    def test_random_mix_uses_vocabulary(self):
+        """Random requests draw from the symptom vocabulary"""
+        vocabulary = ['fever', 'cough', 'headache', 'rash', 'chills', 'nausea', 'fatigue']
+        requests = build_requests(Config.DATASET_PATH, vocabulary, 20, mix='random')
+        assert all(1 <= len(request) <= 6 and set(request) <= set(vocabulary)
+                   for request in requests)
+
+    def test_schedule_rate(self):
+        """Constant and Poisson schedules offer the requested rate"""
+        assert list(arrival_schedule(4, 4)) == [0, 0.25, 0.5, 0.75]
+        poisson = arrival_schedule(100, 5000, poisson=True)
+        assert poisson[-1] == pytest.approx(50, rel=0.1)
+
+class TestOpenLoop:
+    """Test open-loop execution and reporting"""
+
+    def test_latency_includes_queueing(self):
+        """A slow target cannot slow down the arrivals"""
+        def slow_target(symptoms):
+            time.sleep(0.05)
+            return 200
+
+        run = run_open_loop(slow_target, arrival_schedule(100, 20), [['fever']] * 20,
+                            concurrency=1)
+        summary = summarize(run, offered_rate=100)
+
+        # Twenty 50 ms requests through one worker: the last waits ~1 s
+        assert summary['requests'] == 20
+        assert summary['latency']['p99_ms'] > 500
+        assert summary['service_time']['p50_ms'] < 200
+        assert summary['error_rate'] == 0
+
+    def test_flask_target_and_errors(self):
+        """The in-process target reports status codes and error rates"""
+        app = Flask(__name__)
+
+        @app.route('/predict', methods=['POST'])
+        def predict():
+            return jsonify({}), 200
+
+        calls = []
+        target = FlaskTarget(app)
+
+        def flaky_target(symptoms):
+            calls.append(symptoms)
+            return target(symptoms) if len(calls) % 2 else 500
+
+        summary = summarize(run_open_loop(flaky_target, arrival_schedule(500, 10),
+                                          [['fever']] * 10))
+        assert summary['status_counts'] == {'200': 5, '500': 5}
+        assert summary['error_rate'] == 0.5
+
+    def test_empty_run(self):
+        """A run without requests is summarised instead of failing"""
+        summary = summarize(run_open_loop(lambda symptoms: 200, [], []))
+        assert summary['requests'] == 0
+        assert summary['latency']['p99_ms'] is None
+        assert summary['histogram'] == []
+
+    def test_compare_runs(self):
+        """Comparison reports relative latency and throughput change"""
+        baseline = {"latency": {"p50_ms": 10, "p90_ms": 20, "p99_ms": 40, "p99.9_ms": 80},
+                    "throughput_rps": 100, "error_rate": 0.0}
+        current = {"latency": {"p50_ms": 15, "p90_ms": 20, "p99_ms": 20, "p99.9_ms": 80},
+                   "throughput_rps": 90, "error_rate": 0.01}
+        result = compare(current, baseline)
+        assert result['latency']['p50_ms'] == pytest.approx(0.5)
+        assert result['latency']['p99_ms'] == pytest.approx(-0.5)
+        assert result['throughput_rps'] == pytest.approx(-0.1)
+
+class TestReplay:
+    """Test loading recorded traffic"""
+
+    def test_jsonl_replay(self, tmp_path):
+        """JSON lines are sorted by offset"""
+        path = tmp_path / 'traffic.jsonl'
+        path.write_text('{"offset": 1.5, "symptoms": ["cough"]}\n'
+                        '{"offset": 0.0, "symptoms": ["fever"]}\n')
+        assert load_replay(str(path)) == [(0.0, ['fever']), (1.5, ['cough'])]
+
+    def test_audit_database_replay(self, tmp_path):
+        """Audit records replay relative to the first request"""
+        db_path = str(tmp_path / 'audit.db')
+        audit_logger = AuditLogger(db_path)
+        audit_logger.record(['fever'], 'Cold', 'v1', 1.0)
+        audit_logger.record(['cough'], 'Flu', 'v1', 1.0)
+        audit_logger.close()
+
+        traffic = load_replay(db_path)
+        assert [symptoms for _, symptoms in traffic] == [['fever'], ['cough']]
+        assert traffic[0][0] == 0.0
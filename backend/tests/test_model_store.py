@@ -0,0 +1,180 @@
+"""
+Tests for the model store and versioned routing
+"""
+import pytest
+import json
+import shutil
+import threading
+import time
+import numpy as np
+from unittest.mock import MagicMock
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.model_store import ModelStore, estimate_model_bytes
+
+def fake_model(nbytes=1000):
+    model = MagicMock()
+    model.nbytes = nbytes
+    return model
+
+@pytest.fixture
+def loads():
+    """Paths loaded by the fake loader, in order"""
+    return []
+
+@pytest.fixture
+def store(loads):
+    def loader(path):
+        loads.append(path)
+        return fake_model(), None
+    store = ModelStore(loader, max_loaded=2)
+    store.register('v1', 'v1.joblib', pinned=True, model=fake_model(), default=True)
+    store.register('v2', 'v2.joblib', percent=20)
+    store.register('v3', 'v3.joblib', percent=10)
+    return store
+
+class TestModelStore:
+    """Test lazy loading, eviction and routing"""
+
+    def test_versions_load_lazily(self, store, loads):
+        """Registered versions are only loaded when first requested"""
+        assert loads == []
+        store.get('v2')
+        store.get('v2')
+        assert loads == ['v2.joblib']
+        metrics = store.get_metrics()['versions']['v2']
+        assert metrics['loads'] == 1
+        assert metrics['hits'] == 2
+        assert metrics['load_ms_last'] is not None
+
+    def test_lru_eviction_keeps_pinned_default(self, store, loads):
+        """Loading past max_loaded evicts the least recently used unpinned version"""
+        store.get('v2')
+        store.get('v3')
+        metrics = store.get_metrics()
+        assert metrics['loaded'] == ['v1', 'v3']
+        assert metrics['versions']['v2']['evictions'] == 1
+
+        store.get('v2')
+        assert loads == ['v2.joblib', 'v3.joblib', 'v2.joblib']
+
+    def test_memory_budget_evicts(self):
+        """Versions are evicted when their estimated size exceeds the budget"""
+        store = ModelStore(lambda path: (fake_model(600), None), max_loaded=5,
+                           memory_budget_bytes=1500)
+        store.register('a', 'a', pinned=True, model=fake_model(600))
+        store.register('b', 'b')
+        store.register('c', 'c')
+        store.get('b')
+        store.get('c')
+        metrics = store.get_metrics()
+        assert metrics['loaded'] == ['a', 'c']
+        assert metrics['loaded_bytes'] == 1200
+
+    def test_routing_is_deterministic(self, store):
+        """The same key always routes to the same version"""
+        assert all(store.route('user-42') == store.route('user-42') for _ in range(10))
+
+    def test_routing_follows_percentages(self, store):
+        """Hashed keys are split according to the configured percentages"""
+        routes = [store.route(f"user-{i}") for i in range(20000)]
+        shares = {name: routes.count(name) / len(routes) for name in ('v1', 'v2', 'v3')}
+        assert shares['v1'] == pytest.approx(0.7, abs=0.02)
+        assert shares['v2'] == pytest.approx(0.2, abs=0.02)
+        assert shares['v3'] == pytest.approx(0.1, abs=0.02)
+
+    def test_requested_version_wins(self, store):
+        """An explicit version overrides hashing; unknown versions are rejected"""
+        assert store.route('anything', requested='v3') == 'v3'
+        with pytest.raises(ValueError):
+            store.route('anything', requested='missing')
+
+    def test_percentages_are_validated(self, store):
+        """Routed shares cannot exceed 100 percent"""
+        with pytest.raises(ValueError):
+            store.register('v4', 'v4.joblib', percent=75)
+        with pytest.raises(ValueError):
+            store.register('v2', 'again.joblib')
+
+    def test_concurrent_first_use_loads_once(self):
+        """Requests racing for an unloaded version share one load"""
+        calls = []
+        def slow_loader(path):
+            calls.append(path)
+            time.sleep(0.05)
+            return fake_model(), None
+        store = ModelStore(slow_loader)
+        store.register('v1', 'v1.joblib')
+        threads = [threading.Thread(target=store.get, args=('v1',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert calls == ['v1.joblib']
+        assert store.get_metrics()['versions']['v1']['hits'] == 8
+
+    def test_latency_metrics(self, store):
+        """Recorded latencies are summarised per version"""
+        for latency in (1.0, 2.0, 3.0):
+            store.record('v1', latency)
+        latency = store.get_metrics()['versions']['v1']['latency']
+        assert latency['window'] == 3
+        assert latency['p50_ms'] == 2.0
+
+    def test_estimate_model_bytes(self):
+        """sklearn forests are sized from their node arrays"""
+        from sklearn.tree import DecisionTreeClassifier
+        rng = np.random.RandomState(0)
+        tree = DecisionTreeClassifier().fit(rng.randint(0, 8, size=(50, 4)), [0, 1] * 25)
+        assert estimate_model_bytes(tree) >= tree.tree_.value.nbytes
+
+class TestVersionedServing:
+    """Test versioned routing through the API"""
+
+    @pytest.fixture
+    def client(self, app_factory, fitted_model_path, tmp_path):
+        canary_path = str(tmp_path / 'canary.joblib')
+        shutil.copy(fitted_model_path, canary_path)
+        app = app_factory(MODEL_VERSIONS=[{'name': 'canary', 'path': canary_path,
+                                           'percent': 50}])
+        return app.test_client()
+
+    def test_header_selects_version(self, client):
+        """X-Model-Version picks the version and the response names it"""
+        response = client.post('/predict', json={'symptoms': ['itching']},
+                               headers={'X-Model-Version': 'canary'})
+        assert response.status_code == 200
+        assert json.loads(response.data)['model_version'] == 'canary'
+
+    def test_unknown_version_is_rejected(self, client):
+        """Requesting an unregistered version is a client error"""
+        response = client.post('/predict', json={'symptoms': ['itching']},
+                               headers={'X-Model-Version': 'missing'})
+        assert response.status_code == 400
+
+    def test_routing_key_is_sticky(self, client):
+        """The same routing key is always served by the same version"""
+        versions = {
+            json.loads(client.post('/predict', json={'symptoms': ['itching']},
+                                   headers={'X-Routing-Key': 'user-7'}).data)['model_version']
+            for _ in range(5)
+        }
+        assert len(versions) == 1
+
+    def test_models_endpoint(self, client):
+        """GET /models reports load and hit counts per version"""
+        client.post('/predict', json={'symptoms': ['itching']},
+                    headers={'X-Model-Version': 'canary'})
+        data = json.loads(client.get('/models').data)
+        assert data['default'] == 'model'
+        assert data['versions']['canary']['loads'] == 1
+        assert data['versions']['canary']['hits'] == 1
+        assert data['versions']['model']['pinned'] is True
+        assert all('path' not in version for version in data['versions'].values())
+        assert 'canary.joblib' not in client.get('/models').get_data(as_text=True)
+
+    def test_models_endpoint_without_versions(self, app_factory):
+        """Without configured versions the endpoint is not available"""
+        assert app_factory().test_client().get('/models').status_code == 404
@@ -0,0 +1,128 @@
+"""
+Tests for the profiling helpers and admin profiling endpoints
+"""
+import pytest
+import json
+import threading
+import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.profiling_service import format_collapsed, profile_call, sample_stacks
+
+ADMIN_HEADERS = {'X-Admin-Token': 'secret'}
+
+def _busy_wait(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+class TestProfilingHelpers:
+    """Test stack sampling and cProfile helpers"""
+
+    def test_sample_stacks_sees_other_threads(self):
+        """Collapsed stacks include the frames of a busy thread"""
+        stop = threading.Event()
+        worker = threading.Thread(target=_busy_wait, args=(stop,), name='busy-worker')
+        worker.start()
+        try:
+            stacks = sample_stacks(0.1, interval=0.005)
+        finally:
+            stop.set()
+            worker.join()
+
+        busy = [stack for stack in stacks if stack.startswith('busy-worker;')]
+        assert busy and all('_busy_wait' in stack for stack in busy)
+        assert not any('sample_stacks' in stack for stack in stacks)
+
+    def test_format_collapsed(self):
+        """Each line is a stack followed by its sample count"""
+        from collections import Counter
+        text = format_collapsed(Counter({'main;a;b': 3, 'main;a': 1}))
+        assert text == 'main;a;b 3\nmain;a 1\n'
+
+    def test_profile_call(self):
+        """The function result is returned together with its stats"""
+        result, profile = profile_call(sorted, [3, 1, 2])
+        assert result == [1, 2, 3]
+        assert profile['total_calls'] >= 1
+        assert 'sorted' in profile['stats']
+
+        with pytest.raises(ValueError):
+            profile_call(sorted, [], sort='random')
+
+class TestProfilingEndpoints:
+    """Test the admin-protected profiling surface"""
+
+    @pytest.fixture(scope='class')
+    @classmethod
+    def client(cls, app_factory, tmp_path_factory):
+        """App with profiling enabled"""
+        return app_factory(PROFILING_ENABLED=True, ADMIN_TOKEN='secret',
+                           PROFILING_OUTPUT_DIR=str(tmp_path_factory.mktemp('profiles'))).test_client()
+
+    @pytest.fixture(scope='class')
+    @classmethod
+    def disabled_client(cls, app_factory):
+        """App with the default (disabled) profiling settings"""
+        return app_factory(PROFILING_ENABLED=False, ADMIN_TOKEN=None).test_client()
+
+    def test_profile_requires_admin(self, client):
+        """The sampling endpoint rejects missing or wrong tokens"""
+        assert client.get('/admin/profile?seconds=0.01').status_code == 403
+        response = client.get('/admin/profile?seconds=0.01', headers={'X-Admin-Token': 'nope'})
+        assert response.status_code == 403
+
+    def test_profile_returns_collapsed_stacks(self, client):
+        """Sampling returns plain-text collapsed stacks"""
+        response = client.get('/admin/profile?seconds=0.05', headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+
+    def test_profile_rejects_long_runs(self, client):
+        """The sampling duration is capped"""
+        response = client.get('/admin/profile?seconds=3600', headers=ADMIN_HEADERS)
+        assert response.status_code == 400
+
+    def test_background_profile(self, client):
+        """Background sampling writes the stacks to a file"""
+        response = client.get('/admin/profile?seconds=0.05&background=1', headers=ADMIN_HEADERS)
+        assert response.status_code == 202
+        path = json.loads(response.data)['path']
+        for _ in range(100):
+            if os.path.exists(path):
+                break
+            time.sleep(0.05)
+        assert os.path.exists(path)
+
+    def test_request_profile_header(self, client):
+        """X-Profile returns cProfile stats with the prediction"""
+        response = client.post('/predict',
+            data=json.dumps({'symptoms': ['itching', 'skin_rash']}),
+            content_type='application/json',
+            headers=dict(ADMIN_HEADERS, **{'X-Profile': '1'})
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert 'disease' in data
+        assert 'predict_disease' in data['profile']['stats']
+
+    def test_request_profile_requires_admin(self, client):
+        """Profiling a request needs the admin token"""
+        response = client.post('/predict',
+            data=json.dumps({'symptoms': ['itching']}),
+            content_type='application/json',
+            headers={'X-Profile': '1'}
+        )
+        assert response.status_code == 403
+
+    def test_disabled_by_default(self, disabled_client):
+        """Without configuration there is no endpoint and the header is ignored"""
+        assert disabled_client.get('/admin/profile', headers=ADMIN_HEADERS).status_code == 404
+        response = disabled_client.post('/predict',
+            data=json.dumps({'symptoms': ['itching']}),
+            content_type='application/json',
+            headers=dict(ADMIN_HEADERS, **{'X-Profile': '1'})
+        )
+        assert response.status_code == 200
+        assert 'profile' not in json.loads(response.data)
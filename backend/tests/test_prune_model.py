@@ -0,0 +1,83 @@
+"""
+Tests for the latency-budgeted pruning and distillation tool
+"""
+import json
+from unittest.mock import patch, MagicMock
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.compact_forest import CompactForest
+from services.prediction_service import PredictionService
+from tools.prune_model import pareto_front, recommend, run_search
+
+class TestParetoSelection:
+    """Test variant selection helpers"""
+
+    def test_pareto_front_drops_dominated(self):
+        """A slower and less accurate variant is not on the front"""
+        records = [
+            {"name": "fast", "accuracy": 0.90, "row_p99_ms": 0.1, "batch_us_per_row": 1.0},
+            {"name": "accurate", "accuracy": 0.99, "row_p99_ms": 0.5, "batch_us_per_row": 5.0},
+            {"name": "worse", "accuracy": 0.85, "row_p99_ms": 0.6, "batch_us_per_row": 6.0},
+        ]
+        assert pareto_front(records) == ["fast", "accurate"]
+
+    def test_recommend_within_budget(self):
+        """The most accurate variant under the budget is recommended"""
+        records = [
+            {"name": "fast", "accuracy": 0.90, "row_p99_ms": 0.1},
+            {"name": "accurate", "accuracy": 0.99, "row_p99_ms": 0.5},
+        ]
+        assert recommend(records, 0.2) == "fast"
+        assert recommend(records, 1.0) == "accurate"
+        assert recommend(records, 0.01) is None
+
+class TestRunSearch:
+    """Test the end-to-end variant search"""
+
+    def test_writes_pareto_tiers(self, forest, training_data, tmp_path):
+        """Pareto-optimal variants are saved and loadable as model tiers"""
+        X, y = training_data
+        report = run_search(forest, X, y, output_dir=str(tmp_path), latency_budget_ms=1000,
+                            tree_counts=(5,), depths=(4,), distilled_tree_depths=(None,),
+                            distilled_forest_sizes=())
+
+        names = {record["name"] for record in report["variants"]}
+        assert {"original", "trees-5-depth-4", "trees-25-depth-full",
+                "distilled-tree-depth-full"} <= names
+        if report["keep_original"]:
+            assert report["recommended"] is None
+        else:
+            assert (tmp_path / f"{report['recommended']}.npz").exists()
+        with open(tmp_path / 'report.json') as f:
+            assert json.load(f)["pareto"] == report["pareto"]
+
+        tier = next(name for name in report["pareto"] if name != "original")
+        config = MagicMock()
+        config.MODEL_FORMAT = 'compact'
+        config.MODEL_TIER = tier
+        config.MODEL_TIERS_DIR = str(tmp_path)
+        with patch('services.prediction_service.load'):
+            prediction_service = PredictionService(config, MagicMock())
+        assert isinstance(prediction_service.model, CompactForest)
+
+    def test_recommendation_is_a_saved_tier(self, forest, training_data, tmp_path):
+        """The original model is never recommended as a tier, since none is written for it"""
+        X, y = training_data
+        with patch('tools.prune_model.recommend', return_value='original'):
+            report = run_search(forest, X, y, output_dir=str(tmp_path), latency_budget_ms=1000,
+                                tree_counts=(5,), depths=(4,), distilled_tree_depths=(),
+                                distilled_forest_sizes=())
+        assert report["recommended"] is None
+        assert report["keep_original"] is True
+        assert not (tmp_path / 'original.npz').exists()
+
+    def test_truncated_depth_reduces_nodes(self, forest):
+        """Depth caps and tree counts shrink the compact forest"""
+        full = CompactForest.from_estimator(forest)
+        pruned = CompactForest.from_estimator(forest, n_estimators=5, max_depth=3)
+
+        assert pruned.n_estimators == 5
+        assert pruned.max_depth == 3
+        assert pruned.n_nodes < full.n_nodes
@@ -95,6 +95,9 @@ class TestPredictionService:
             'Symptom': ['fever', 'cough', 'headache'],
             'weight': [1, 2, 3]
         })
+        data_service.get_symptom_weights.return_value = {
+            'fever': 1, 'cough': 2, 'headache': 3
+        }
         data_service.get_disease_descriptions.return_value = {
             'Cold': 'Cold description'
         }
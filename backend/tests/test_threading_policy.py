@@ -0,0 +1,220 @@
+"""
+Tests for the threading policy and batch prediction
+"""
+import pytest
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+from joblib import dump
+from sklearn.ensemble import RandomForestClassifier
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import threading_policy
+from services.threading_policy import ThreadingPolicy, available_cpus, detect_cpu_quota
+from services.prediction_service import PredictionService, load_model_file
+
+ADMIN_HEADERS = {'X-Admin-Token': 'secret'}
+
+def policy_config(**overrides):
+    settings = {'WEB_WORKERS': 0, 'WEB_THREADS': 0, 'NATIVE_THREADS': 0,
+                'SINGLE_ROW_N_JOBS': 1, 'BATCH_N_JOBS': 0}
+    settings.update(overrides)
+    return SimpleNamespace(**settings)
+
+@pytest.fixture
+def cgroup(tmp_path, monkeypatch):
+    """Point the cgroup files at a temporary directory; returns a writer"""
+    paths = {'v2': tmp_path / 'cpu.max', 'quota': tmp_path / 'cpu.cfs_quota_us',
+             'period': tmp_path / 'cpu.cfs_period_us'}
+    monkeypatch.setattr(threading_policy, '_CGROUP_V2_CPU_MAX', str(paths['v2']))
+    monkeypatch.setattr(threading_policy, '_CGROUP_V1_QUOTA', str(paths['quota']))
+    monkeypatch.setattr(threading_policy, '_CGROUP_V1_PERIOD', str(paths['period']))
+    def write(**files):
+        for name, content in files.items():
+            paths[name].write_text(content)
+    return write
+
+class TestCpuDetection:
+    """Test reading the container CPU quota"""
+
+    def test_no_cgroup_files(self, cgroup):
+        """Without cgroup files there is no quota"""
+        assert detect_cpu_quota() is None
+
+    def test_cgroup_v2_quota(self, cgroup):
+        """cpu.max holds the quota and the period"""
+        cgroup(v2='250000 100000\n')
+        assert detect_cpu_quota() == 2.5
+
+    def test_cgroup_v2_unlimited(self, cgroup):
+        """'max' means no quota"""
+        cgroup(v2='max 100000\n')
+        assert detect_cpu_quota() is None
+
+    def test_cgroup_v1_quota(self, cgroup):
+        """v1 uses separate quota and period files, with -1 for unlimited"""
+        cgroup(quota='150000\n', period='100000\n')
+        assert detect_cpu_quota() == 1.5
+        cgroup(quota='-1\n')
+        assert detect_cpu_quota() is None
+
+    def test_quota_caps_available_cpus(self, cgroup):
+        """A fractional quota rounds up and never exceeds the affinity mask"""
+        cgroup(v2='50000 100000')
+        assert available_cpus() == 1
+        with patch('os.sched_getaffinity', return_value={0, 1, 2, 3, 4, 5, 6, 7}, create=True):
+            cgroup(v2='250000 100000')
+            assert available_cpus() == 3
+            cgroup(v2='max 100000')
+            assert available_cpus() == 8
+
+class TestThreadingPolicy:
+    """Test sizing workers, threads and n_jobs"""
+
+    def test_defaults_use_one_worker_per_cpu(self):
+        """Each worker gets one CPU, so native pools run single threaded"""
+        policy = ThreadingPolicy.from_config(policy_config(), cpus=4)
+        assert (policy.workers, policy.web_threads, policy.native_threads) == (4, 1, 1)
+        assert policy.single_row_n_jobs == 1
+        assert policy.batch_n_jobs == 1
+
+    def test_fewer_workers_get_more_native_threads(self):
+        """CPUs left over per worker go to the native pools and batches"""
+        policy = ThreadingPolicy.from_config(policy_config(WEB_WORKERS=2), cpus=8)
+        assert policy.native_threads == 4
+        assert policy.batch_n_jobs == 4
+
+    def test_explicit_settings_win(self):
+        """Configured values override the automatic sizing"""
+        policy = ThreadingPolicy.from_config(
+            policy_config(WEB_WORKERS=3, WEB_THREADS=4, NATIVE_THREADS=2,
+                          SINGLE_ROW_N_JOBS=2, BATCH_N_JOBS=6), cpus=16)
+        assert policy.describe()['cpus'] == 16
+        assert (policy.workers, policy.web_threads, policy.native_threads) == (3, 4, 2)
+        assert (policy.single_row_n_jobs, policy.batch_n_jobs) == (2, 6)
+
+    def test_apply_limits_native_pools(self):
+        """Every loaded native pool is limited to the native thread budget"""
+        policy = ThreadingPolicy(cpus=1, workers=1, web_threads=1, native_threads=1)
+        try:
+            policy.apply()
+            assert all(pool['num_threads'] == 1 for pool in policy.threadpool_info())
+        finally:
+            policy._limits.restore_original_limits()
+
+class TestPredictionThreading:
+    """Test that predictions use the n_jobs chosen by the policy"""
+
+    @staticmethod
+    def make_service(policy):
+        config = MagicMock(MIN_SYMPTOMS=1, MAX_SYMPTOMS=17, MODEL_FORMAT='joblib',
+                           MODEL_PATH='model.joblib')
+        data_service = MagicMock()
+        data_service.get_symptom_weights.return_value = {'itching': 1, 'skin_rash': 3}
+        data_service.get_disease_descriptions.return_value = {}
+        data_service.get_disease_precautions.return_value = {}
+        model = MagicMock(n_jobs=-1)
+        with patch('services.prediction_service.load', return_value=model):
+            return PredictionService(config, data_service, threading_policy=policy)
+
+    @pytest.fixture
+    def service(self):
+        return self.make_service(ThreadingPolicy(cpus=4, workers=1, web_threads=1,
+                                                 native_threads=4, single_row_n_jobs=1,
+                                                 batch_n_jobs=3))
+
+    def test_single_row_and_batch_n_jobs(self, service):
+        """Single rows and batches run under their own joblib n_jobs"""
+        seen = []
+        def predict(input_vector):
+            from joblib.parallel import get_active_backend
+            seen.append(get_active_backend()[1])
+            return ['Allergy'] * len(input_vector)
+        service.model.predict.side_effect = predict
+
+        service.predict_disease(['itching'])
+        results = service.predict_batch([['itching'], ['skin_rash'], ['itching', 'skin_rash']])
+        assert seen == [1, 3]
+        assert [result['disease'] for result in results] == ['Allergy'] * 3
+
+    def test_loaded_model_n_jobs_is_deferred(self, service):
+        """The n_jobs saved with a model is cleared so the policy applies"""
+        assert service.model.n_jobs is None
+
+    def test_n_jobs_kept_without_policy(self):
+        """Without a threading policy the model keeps its own parallelism"""
+        service = self.make_service(None)
+        assert service.model.n_jobs == -1
+        assert service.single_row_n_jobs is None
+
+    def test_load_model_file_clears_n_jobs_on_request(self, tmp_path):
+        """Model store and ensemble loaders only clear n_jobs when asked to"""
+        path = str(tmp_path / 'forest.joblib')
+        dump(RandomForestClassifier(n_estimators=2, n_jobs=2).fit([[0], [1]], [0, 1]), path)
+        assert load_model_file(path).n_jobs == 2
+        assert load_model_file(path, clear_n_jobs=True).n_jobs is None
+
+    def test_batch_validates_every_request(self, service):
+        """One invalid request rejects the batch"""
+        with pytest.raises(ValueError):
+            service.predict_batch([['itching'], []])
+
+class TestBatchEndpoint:
+    """Test POST /predict/batch and GET /debug/threads"""
+
+    @pytest.fixture
+    def client(self, app_factory):
+        return app_factory(MAX_BATCH_SIZE=3, THREADS_DEBUG_ENABLED=True,
+                           ADMIN_TOKEN='secret').test_client()
+
+    def test_batch_prediction(self, client):
+        """Each request in the batch gets its own result"""
+        response = client.post('/predict/batch',
+                               json={'requests': [['itching'], ['skin_rash', 'itching']]})
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['count'] == 2
+        assert all('disease' in result for result in data['results'])
+
+    def test_batch_matches_single_predictions(self, client):
+        """Batched and single-row predictions agree"""
+        batch = [['itching'], ['skin_rash', 'nodal_skin_eruptions']]
+        results = json.loads(client.post('/predict/batch', json={'requests': batch}).data)
+        singles = [json.loads(client.post('/predict', json={'symptoms': symptoms}).data)
+                   for symptoms in batch]
+        assert [r['disease'] for r in results['results']] == [s['disease'] for s in singles]
+
+    @pytest.mark.parametrize('body', [
+        {'requests': []},
+        {'requests': ['itching']},
+        {'requests': [['itching']] * 4},
+        {'requests': [['itching'], []]},
+        {'symptoms': ['itching']},
+    ])
+    def test_invalid_batches(self, client, body):
+        """Empty, malformed, oversized and invalid batches are rejected"""
+        assert client.post('/predict/batch', json=body).status_code == 400
+
+    def test_debug_threads(self, client):
+        """The endpoint reports the policy and the native pools of the worker"""
+        assert client.get('/debug/threads').status_code == 403
+        response = client.get('/debug/threads', headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data['policy']['single_row_n_jobs'] == 1
+        assert data['policy']['workers'] >= 1
+        assert isinstance(data['threadpools'], list)
+
+    def test_debug_threads_without_policy(self, app_factory):
+        """Disabling the policy leaves nothing to report"""
+        client = app_factory(THREADING_POLICY_ENABLED=False, THREADS_DEBUG_ENABLED=True,
+                             ADMIN_TOKEN='secret').test_client()
+        assert client.get('/debug/threads', headers=ADMIN_HEADERS).status_code == 404
+
+    def test_debug_threads_needs_admin_token(self, app_factory):
+        """Without a configured admin token the endpoint is not registered"""
+        client = app_factory(THREADS_DEBUG_ENABLED=True, MEMORY_DEBUG_ENABLED=True,
+                             ADMIN_TOKEN=None).test_client()
+        assert client.get('/debug/threads').status_code == 404
@@ -0,0 +1,138 @@
+"""
+Convert a trained sklearn forest into the compact quantized format
+
+Usage (from the backend directory):
+    python -m tools.compact_model model/random_forest.joblib \
+        model/random_forest.compact.npz [--leaf-mode proba|label] [--json]
+
+The converted forest is checked for prediction equivalence against the
+original on the encoded dataset, and the report lists the reduction in file
+size, load time and resident memory.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from joblib import load
+
+from config import config
+from services.compact_forest import (
+    LEAF_MODES, CompactForest, dtype_summary, validate_equivalence
+)
+from services.data_service import DataService
+
+# Runs in a fresh interpreter so each format is measured in isolation. The
+# loader's imports happen before the baseline reading so only the model
+# itself is attributed to the load.
+_MEASURE_SCRIPT = """
+import json, sys, time
+def rss_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+kind, path = sys.argv[1], sys.argv[2]
+if kind == 'compact':
+    from services.compact_forest import CompactForest
+    loader = CompactForest.load
+else:
+    import sklearn.ensemble, sklearn.tree
+    from joblib import load as loader
+before = rss_kb()
+start = time.perf_counter()
+model = loader(path)
+elapsed = time.perf_counter() - start
+print(json.dumps({"load_seconds": elapsed, "rss_kb": rss_kb() - before}))
+"""
+
+
+def _measure_load(kind: str, path: str, repeat: int = 3) -> dict:
+    """Best-of-``repeat`` load time and the RSS added by loading the model"""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-W', 'ignore', '-c', _MEASURE_SCRIPT, kind, path],
+            check=True, capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "load_seconds": min(run["load_seconds"] for run in runs),
+        "rss_kb": min(run["rss_kb"] for run in runs),
+    }
+
+
+def _ratio(before: float, after: float) -> float:
+    return round(before / after, 2) if after else float('inf')
+
+
+def build_report(model_path: str, output_path: str, leaf_mode: str = 'proba',
+                 config_name: str = 'default') -> dict:
+    """Convert ``model_path``, validate it and measure both formats"""
+    model = load(model_path)
+    compact = CompactForest.from_estimator(model, leaf_mode=leaf_mode)
+    compact.save(output_path)
+
+    features, _ = DataService(config[config_name]).get_training_data()
+    equivalence = validate_equivalence(model, CompactForest.load(output_path), features)
+
+    original = _measure_load('joblib', os.path.abspath(model_path))
+    converted = _measure_load('compact', os.path.abspath(output_path))
+    original["file_bytes"] = os.path.getsize(model_path)
+    converted["file_bytes"] = os.path.getsize(output_path)
+
+    return {
+        "leaf_mode": leaf_mode,
+        "trees": compact.n_estimators,
+        "nodes": compact.n_nodes,
+        "arrays": dtype_summary(compact),
+        "equivalence": equivalence,
+        "original": original,
+        "compact": converted,
+        "reduction": {
+            key: _ratio(original[key], converted[key])
+            for key in ("file_bytes", "load_seconds", "rss_kb")
+        },
+    }
+
+
+def _print_report(report: dict):
+    eq = report["equivalence"]
+    print(f"Trees: {report['trees']}, nodes: {report['nodes']}, leaf mode: {report['leaf_mode']}")
+    for name, (dtype, nbytes) in report["arrays"].items():
+        print(f"  {name:<15} {dtype:<7} {nbytes:>10,} bytes")
+    print(f"Equivalence: {eq['rows'] - eq['mismatches']}/{eq['rows']} rows agree "
+          f"({eq['agreement'] * 100:.3f}%)")
+    print(f"{'':<14}{'original':>14}{'compact':>14}{'reduction':>11}")
+    for key, label, fmt in (("file_bytes", "file bytes", ",.0f"),
+                            ("load_seconds", "load seconds", ".4f"),
+                            ("rss_kb", "resident KB", ",.0f")):
+        print(f"{label:<14}{report['original'][key]:>14{fmt}}{report['compact'][key]:>14{fmt}}"
+              f"{report['reduction'][key]:>10}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('model_path', help='Fitted sklearn forest saved with joblib')
+    parser.add_argument('output_path', help='Destination for the compact .npz file')
+    parser.add_argument('--leaf-mode', choices=LEAF_MODES, default='proba')
+    parser.add_argument('--config', default='default', help='Config name for DataService')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args(argv)
+
+    report = build_report(args.model_path, args.output_path, args.leaf_mode, args.config)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0 if report["equivalence"]["mismatches"] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Append newly labeled records to the dataset's segment store
+
+Usage (from the backend directory):
+    python -m tools.ingest new_cases.csv [more.jsonl ...]
+    python -m tools.ingest --compact
+    python -m tools.ingest --status
+
+CSV files use the dataset.csv layout (Disease followed by symptom columns);
+JSON lines files hold one {"disease": ..., "symptoms": [...]} object per
+line. Only the new rows are encoded; running servers apply the new segment
+at their next refresh instead of reloading the dataset.
+"""
+import argparse
+import json
+import sys
+import pandas as pd
+from typing import Dict, List
+
+from config import config
+from services.data_service import encode_records
+from services.segment_store import SegmentStore
+
+
+def read_records(path: str) -> List[Dict]:
+    """Read records from a dataset-style CSV or a JSON lines file"""
+    if path.endswith('.jsonl') or path.endswith('.json'):
+        with open(path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    raw = pd.read_csv(path)
+    return [
+        {"disease": str(row[0]).strip(),
+         "symptoms": [str(value).strip() for value in row[1:] if pd.notna(value)]}
+        for row in raw.values
+    ]
+
+
+def ingest_files(paths: List[str], store: SegmentStore, settings) -> List[Dict]:
+    """Encode each file and append it as one segment"""
+    severity = pd.read_csv(settings.SYMPTOM_SEVERITY_PATH)
+    weights = dict(zip(severity['Symptom'], severity['weight']))
+    results = []
+    for path in paths:
+        features, labels, symptoms = encode_records(read_records(path), weights,
+                                                    settings.MAX_SYMPTOMS)
+        segment = store.append(features, labels, symptoms)
+        results.append({"path": path, "segment": segment, "records": len(labels)})
+    return results
+
+
+def status(store: SegmentStore) -> Dict:
+    """Live segments and the last sequence number"""
+    return {
+        "directory": store.directory,
+        "last_sequence": store.last_sequence,
+        "segments": [{"first": first, "last": last, "path": path}
+                     for first, last, path in store.segments()],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('paths', nargs='*', help='CSV or JSON lines files of new records')
+    parser.add_argument('--config', default='default', help='Config name')
+    parser.add_argument('--compact', action='store_true', help='Merge the segments afterwards')
+    parser.add_argument('--status', action='store_true', help='List the live segments')
+    args = parser.parse_args(argv)
+
+    settings = config[args.config]
+    if not settings.DATASET_SEGMENTS_DIR:
+        print("Error: set DATASET_SEGMENTS_DIR to the segment store directory", file=sys.stderr)
+        return 1
+    store = SegmentStore.from_config(settings)
+    if args.paths:
+        try:
+            for result in ingest_files(args.paths, store, settings):
+                print(f"{result['path']}: {result['records']} records -> "
+                      f"segment {result['segment']}")
+        except ValueError as e:
+            print(f"Error: {str(e)}", file=sys.stderr)
+            return 1
+    if args.compact:
+        merged = store.compact()
+        print(f"Compacted into {merged}" if merged else "Nothing to compact")
+    if args.status or not (args.paths or args.compact):
+        print(json.dumps(status(store), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,306 @@
+"""
+Open-loop load generator and traffic replay tool for the prediction API
+
+Usage (from the backend directory):
+    python -m tools.loadgen --rate 50 --duration 30 --url http://localhost:5000
+    python -m tools.loadgen --rate 50 --duration 30 --in-process --mix skewed
+    python -m tools.loadgen --replay traffic.jsonl --url http://localhost:5000
+    python -m tools.loadgen ... --output run.json --compare baseline.json
+
+Requests are sent on a fixed schedule (constant or Poisson arrivals) no
+matter how fast the server answers, and latency is measured from each
+request's scheduled send time. A slow server therefore shows up as queueing
+delay in the percentiles instead of silently lowering the offered load
+(coordinated omission).
+
+Replay files are JSON lines with ``offset`` (seconds from the start) and
+``symptoms``, or an audit database written by the audit service.
+"""
+import argparse
+import json
+import sqlite3
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import config
+
+MIXES = ('dataset', 'skewed', 'random')
+
+# Histogram bucket upper bounds in milliseconds (1-2-5 series up to 60 s)
+HISTOGRAM_BOUNDS_MS = [m * 10 ** e for e in range(-1, 5) for m in (1, 2, 5)] + [60000]
+
+
+def build_requests(dataset_path: str, vocabulary: List[str], count: int, mix: str = 'dataset',
+                   zipf_exponent: float = 1.2, seed: int = 0) -> List[List[str]]:
+    """
+    Build a request mix
+
+    Args:
+        mix: 'dataset' samples dataset rows uniformly, 'skewed' samples rows
+            with Zipf-distributed popularity (a few rows dominate) and
+            'random' draws 1-6 symptoms from the vocabulary
+    """
+    if mix not in MIXES:
+        raise ValueError(f"mix must be one of {MIXES}")
+
+    rng = np.random.RandomState(seed)
+    if mix == 'random':
+        sizes = rng.randint(1, 7, size=count)
+        return [list(rng.choice(vocabulary, size=size, replace=False)) for size in sizes]
+
+    raw = pd.read_csv(dataset_path).drop(columns=['Disease']).values
+    rows = [[str(value).strip() for value in row if pd.notna(value)] for row in raw]
+    if mix == 'dataset':
+        indices = rng.randint(0, len(rows), size=count)
+    else:
+        ranks = np.arange(1, len(rows) + 1)
+        weights = 1.0 / ranks ** zipf_exponent
+        popularity = rng.permutation(len(rows))
+        indices = popularity[rng.choice(len(rows), size=count, p=weights / weights.sum())]
+    return [rows[index] for index in indices]
+
+
+def arrival_schedule(rate: float, count: int, poisson: bool = False,
+                     seed: int = 0) -> np.ndarray:
+    """Send offsets in seconds for ``count`` requests at ``rate`` per second"""
+    if poisson:
+        gaps = np.random.RandomState(seed).exponential(1.0 / rate, size=count)
+        return np.concatenate(([0.0], np.cumsum(gaps[:-1])))
+    return np.arange(count) / rate
+
+
+def load_replay(path: str) -> List[Tuple[float, List[str]]]:
+    """Read recorded traffic as (offset seconds, symptoms) pairs"""
+    if path.endswith('.db') or path.endswith('.sqlite'):
+        connection = sqlite3.connect(path)
+        try:
+            rows = connection.execute(
+                "SELECT created_at, symptoms FROM predictions ORDER BY created_at").fetchall()
+        finally:
+            connection.close()
+        if not rows:
+            return []
+        start = rows[0][0]
+        return [(created_at - start, json.loads(symptoms)) for created_at, symptoms in rows]
+
+    traffic = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                traffic.append((float(record['offset']), record['symptoms']))
+    return sorted(traffic, key=lambda item: item[0])
+
+
+class HttpTarget:
+    """Send requests to a running server"""
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.url = base_url.rstrip('/') + '/predict'
+        self.timeout = timeout
+
+    def __call__(self, symptoms: List[str]) -> int:
+        body = json.dumps({'symptoms': symptoms}).encode()
+        req = urllib.request.Request(self.url, data=body,
+                                     headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+        except (urllib.error.URLError, OSError):
+            return 0
+
+
+class FlaskTarget:
+    """Send requests through the in-process Flask test client"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def __call__(self, symptoms: List[str]) -> int:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client.post('/predict', json={'symptoms': symptoms}).status_code
+
+
+def run_open_loop(target: Callable[[List[str]], int], schedule,
+                  requests: List[List[str]], concurrency: int = 64) -> Dict:
+    """
+    Send ``requests[i]`` at ``schedule[i]`` seconds after the start
+
+    Returns:
+        Raw results with scheduled, started and finished times per request
+    """
+    results = [None] * len(requests)
+    executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='loadgen')
+
+    def send(index: int, scheduled: float):
+        started = time.perf_counter()
+        try:
+            status = target(requests[index])
+        except Exception:
+            status = 0
+        results[index] = (scheduled, started, time.perf_counter(), status)
+
+    start = time.perf_counter()
+    for index, offset in enumerate(schedule):
+        scheduled = start + offset
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        executor.submit(send, index, scheduled)
+    executor.shutdown(wait=True)
+    return {"start": start, "end": time.perf_counter(), "results": results}
+
+
+def summarize(run: Dict, offered_rate: Optional[float] = None) -> Dict:
+    """Latency percentiles, histogram, throughput and error rates"""
+    results = np.array([result for result in run["results"] if result is not None])
+    if not len(results):
+        # An empty replay file or audit database: report the run, with no statistics
+        empty = dict.fromkeys(("p50_ms", "p90_ms", "p99_ms", "p99.9_ms"))
+        return {
+            "requests": 0,
+            "duration_s": run["end"] - run["start"],
+            "offered_rate": offered_rate,
+            "throughput_rps": 0.0,
+            "error_rate": None,
+            "status_counts": {},
+            "latency": dict(empty, mean_ms=None, max_ms=None),
+            "service_time": dict(empty),
+            "send_lag": dict(empty),
+            "histogram": [],
+        }
+    scheduled, started, finished, status = results.T
+    latency_ms = (finished - scheduled) * 1000
+    service_ms = (finished - started) * 1000
+    send_lag_ms = (started - scheduled) * 1000
+    ok = (status >= 200) & (status < 300)
+    elapsed = run["end"] - run["start"]
+
+    counts, _ = np.histogram(latency_ms, bins=[0] + HISTOGRAM_BOUNDS_MS + [np.inf])
+    histogram = [{"le_ms": bound, "count": int(count)}
+                 for bound, count in zip(HISTOGRAM_BOUNDS_MS + ['inf'], counts) if count]
+
+    def percentiles(values):
+        return {name: float(np.percentile(values, q)) for name, q in
+                (("p50_ms", 50), ("p90_ms", 90), ("p99_ms", 99), ("p99.9_ms", 99.9))}
+
+    statuses = {str(int(code)): int((status == code).sum()) for code in np.unique(status)}
+    return {
+        "requests": int(len(results)),
+        "duration_s": elapsed,
+        "offered_rate": offered_rate,
+        "throughput_rps": float(ok.sum() / elapsed) if elapsed else 0.0,
+        "error_rate": float(1 - ok.mean()),
+        "status_counts": statuses,
+        "latency": dict(percentiles(latency_ms), mean_ms=float(latency_ms.mean()),
+                        max_ms=float(latency_ms.max())),
+        "service_time": percentiles(service_ms),
+        "send_lag": percentiles(send_lag_ms),
+        "histogram": histogram,
+    }
+
+
+def compare(current: Dict, baseline: Dict) -> Dict:
+    """Relative change of the headline metrics against a saved run"""
+    def change(new, old):
+        return None if new is None or not old else (new - old) / old
+
+    keys = ("p50_ms", "p90_ms", "p99_ms", "p99.9_ms")
+    return {
+        "latency": {key: change(current["latency"][key], baseline["latency"][key])
+                    for key in keys},
+        "throughput_rps": change(current["throughput_rps"], baseline["throughput_rps"]),
+        "error_rate": (None if current["error_rate"] is None or baseline["error_rate"] is None
+                       else current["error_rate"] - baseline["error_rate"]),
+    }
+
+
+def _print_summary(summary: Dict):
+    if not summary["requests"]:
+        print("No requests were sent")
+        return
+    latency = summary["latency"]
+    print(f"Requests: {summary['requests']} in {summary['duration_s']:.1f} s "
+          f"(offered {summary['offered_rate'] or 'replay'} rps, "
+          f"achieved {summary['throughput_rps']:.1f} rps, "
+          f"errors {summary['error_rate'] * 100:.2f}%)")
+    print("Latency from scheduled send: " + ", ".join(
+        f"{key[:-3]} {latency[key]:.2f} ms" for key in ("p50_ms", "p90_ms", "p99_ms", "p99.9_ms")))
+    for bucket in summary["histogram"]:
+        print(f"  <= {bucket['le_ms']:>7} ms  {bucket['count']}")
+    if "comparison" in summary:
+        print("Change vs baseline: " + json.dumps(summary["comparison"]))
+
+
+def _make_target(args):
+    if args.in_process:
+        from app_refactored import create_app
+        return FlaskTarget(create_app(args.config))
+    return HttpTarget(args.url, timeout=args.timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--rate', type=float, default=20.0, help='Arrivals per second')
+    source.add_argument('--replay', help='JSON lines or audit database of recorded traffic')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds of load to offer')
+    parser.add_argument('--poisson', action='store_true', help='Exponential inter-arrival times')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed multiplier')
+    parser.add_argument('--mix', choices=MIXES, default='dataset')
+    parser.add_argument('--zipf', type=float, default=1.2, help='Skew exponent for --mix skewed')
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', default='http://localhost:5000')
+    target.add_argument('--in-process', action='store_true',
+                        help='Use the Flask test client instead of HTTP')
+    parser.add_argument('--config', default='default', help='Config name')
+    parser.add_argument('--concurrency', type=int, default=64, help='Maximum requests in flight')
+    parser.add_argument('--timeout', type=float, default=10.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Save the summary as JSON')
+    parser.add_argument('--compare', help='Saved summary to compare against')
+    args = parser.parse_args(argv)
+
+    settings = config[args.config]
+    if args.replay:
+        traffic = load_replay(args.replay)
+        schedule = np.array([offset for offset, _ in traffic]) / args.speed
+        requests = [symptoms for _, symptoms in traffic]
+        offered_rate = None
+    else:
+        count = max(int(args.rate * args.duration), 1)
+        vocabulary = pd.read_csv(settings.SYMPTOM_SEVERITY_PATH)['Symptom'].unique().tolist()
+        requests = build_requests(settings.DATASET_PATH, vocabulary, count, args.mix,
+                                  args.zipf, args.seed)
+        schedule = arrival_schedule(args.rate, count, args.poisson, args.seed)
+        offered_rate = args.rate
+
+    summary = summarize(run_open_loop(_make_target(args), schedule, requests, args.concurrency),
+                        offered_rate)
+    summary["settings"] = {key: value for key, value in vars(args).items()
+                           if key not in ('output', 'compare')}
+    if args.compare:
+        with open(args.compare) as f:
+            summary["comparison"] = compare(summary, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+    _print_summary(summary)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Search smaller variants of the trained forest for a latency budget
+
+Usage (from the backend directory):
+    python -m tools.prune_model model/random_forest.joblib \
+        [--output-dir model/tiers] [--latency-budget-ms 1.0] [--json]
+
+Variants are built from the trained model without retraining (first N trees,
+trees truncated to a maximum depth) and by distillation (a single decision
+tree or a small forest fitted to the big model's predictions). Each variant
+is scored on a held-out split for accuracy and for single-row and batch
+inference latency. The Pareto-optimal variants are written to the output
+directory as compact forests, together with ``report.json``; serve one by
+setting ``MODEL_TIER`` to its name.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+from joblib import load
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeClassifier
+
+from config import config
+from services.compact_forest import CompactForest
+from services.data_service import DataService
+
+DEFAULT_TREE_COUNTS = (10, 25, 50, 100)
+DEFAULT_DEPTHS = (6, 9)
+DEFAULT_DISTILLED_TREE_DEPTHS = (8, 12, None)
+DEFAULT_DISTILLED_FOREST_SIZES = (10, 25)
+
+
+def _depth_label(depth) -> str:
+    return 'full' if depth is None else str(depth)
+
+
+def build_variants(teacher, X_train, tree_counts=DEFAULT_TREE_COUNTS,
+                   depths=DEFAULT_DEPTHS,
+                   distilled_tree_depths=DEFAULT_DISTILLED_TREE_DEPTHS,
+                   distilled_forest_sizes=DEFAULT_DISTILLED_FOREST_SIZES,
+                   random_state: int = 42) -> list:
+    """
+    Build the candidate models
+
+    Returns:
+        List of (name, kind, model) tuples where every model is a CompactForest
+    """
+    variants = []
+    total_trees = len(getattr(teacher, 'estimators_', [teacher]))
+    counts = sorted({count for count in tree_counts if count < total_trees} | {total_trees})
+    for count in counts:
+        for depth in tuple(depths) + (None,):
+            name = f"trees-{count}-depth-{_depth_label(depth)}"
+            model = CompactForest.from_estimator(teacher, n_estimators=count, max_depth=depth)
+            variants.append((name, 'pruned', model))
+
+    # Students learn the teacher's decision function rather than the raw labels
+    teacher_labels = np.asarray(teacher.predict(X_train)).astype(str)
+    for depth in distilled_tree_depths:
+        student = DecisionTreeClassifier(max_depth=depth, random_state=random_state)
+        student.fit(X_train, teacher_labels)
+        variants.append((f"distilled-tree-depth-{_depth_label(depth)}", 'distilled',
+                         CompactForest.from_estimator(student)))
+    for size in distilled_forest_sizes:
+        student = RandomForestClassifier(n_estimators=size, max_features='sqrt',
+                                         random_state=random_state)
+        student.fit(X_train, teacher_labels)
+        variants.append((f"distilled-forest-{size}", 'distilled',
+                         CompactForest.from_estimator(student)))
+    return variants
+
+
+def measure_latency(model, X, rows: int = 500, row_repeat: int = 3,
+                    batch_repeat: int = 5) -> dict:
+    """
+    Time single-row predictions (as PredictionService issues them) and
+    whole-batch predictions
+
+    Returns:
+        Per-row p50/p99 in milliseconds and per-batch time in milliseconds
+    """
+    X = np.asarray(X)
+    sample = X[:rows]
+    model.predict(sample[:1])  # warm-up
+
+    timings = []
+    for _ in range(row_repeat):
+        for row in sample:
+            start = time.perf_counter()
+            model.predict([row.tolist()])
+            timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+
+    batch_timings = []
+    for _ in range(batch_repeat):
+        start = time.perf_counter()
+        model.predict(X)
+        batch_timings.append(time.perf_counter() - start)
+    batch_ms = min(batch_timings) * 1000
+
+    return {
+        "row_p50_ms": float(np.percentile(timings, 50)),
+        "row_p99_ms": float(np.percentile(timings, 99)),
+        "batch_ms": batch_ms,
+        "batch_rows": len(X),
+        "batch_us_per_row": batch_ms * 1000 / max(len(X), 1),
+    }
+
+
+def evaluate(name: str, kind: str, model, X_test, y_test, teacher_test=None) -> dict:
+    """Accuracy, teacher fidelity and latency of one variant"""
+    predictions = np.asarray(model.predict(X_test)).astype(str)
+    record = {
+        "name": name,
+        "kind": kind,
+        "accuracy": float((predictions == y_test).mean()),
+    }
+    if teacher_test is not None:
+        record["fidelity"] = float((predictions == teacher_test).mean())
+    if isinstance(model, CompactForest):
+        record["trees"] = model.n_estimators
+        record["nodes"] = model.n_nodes
+        record["bytes"] = model.nbytes
+    record.update(measure_latency(model, X_test))
+    return record
+
+
+PARETO_LATENCY_KEYS = ('row_p99_ms', 'batch_us_per_row')
+
+
+def _dominates(other: dict, record: dict, latency_keys) -> bool:
+    no_worse = other["accuracy"] >= record["accuracy"] and all(
+        other[key] <= record[key] for key in latency_keys)
+    better = other["accuracy"] > record["accuracy"] or any(
+        other[key] < record[key] for key in latency_keys)
+    return no_worse and better
+
+
+def pareto_front(records: list, latency_keys=PARETO_LATENCY_KEYS) -> list:
+    """Names of the records not dominated on accuracy and the latency keys"""
+    return [record["name"] for record in records
+            if not any(_dominates(other, record, latency_keys) for other in records)]
+
+
+def recommend(records: list, budget_ms: float, latency_key: str = 'row_p99_ms'):
+    """Most accurate variant within the latency budget (fastest on ties)"""
+    within = [record for record in records if record[latency_key] <= budget_ms]
+    if not within:
+        return None
+    return max(within, key=lambda record: (record["accuracy"], -record[latency_key]))["name"]
+
+
+def run_search(teacher, features, labels, output_dir: str = None,
+               latency_budget_ms: float = None, test_size: float = 0.2,
+               random_state: int = 42, **variant_options) -> dict:
+    """
+    Build, evaluate and select model variants
+
+    Accuracy is measured on an 80/20 split with random_state=42, as in the
+    training notebook; fidelity is agreement with the original model.
+    """
+    X_train, X_test, _, y_test = train_test_split(
+        features, labels, test_size=test_size, random_state=random_state)
+    y_test = np.asarray(y_test).astype(str)
+    teacher_test = np.asarray(teacher.predict(X_test)).astype(str)
+
+    records = [evaluate('original', 'original', teacher, X_test, y_test, teacher_test)]
+    models = {}
+    for name, kind, model in build_variants(teacher, X_train, random_state=random_state,
+                                            **variant_options):
+        records.append(evaluate(name, kind, model, X_test, y_test, teacher_test))
+        models[name] = model
+
+    front = pareto_front(records)
+    for record in records:
+        record["pareto"] = record["name"] in front
+
+    # Only Pareto-optimal variants are written as tiers; the original model is
+    # served by leaving MODEL_TIER unset, so it is reported as keep_original
+    recommended = None
+    if latency_budget_ms:
+        recommended = recommend([record for record in records if record["pareto"]],
+                                latency_budget_ms)
+    report = {
+        "test_rows": len(y_test),
+        "variants": records,
+        "pareto": front,
+        "recommended": None if recommended == 'original' else recommended,
+        "keep_original": recommended == 'original',
+        "latency_budget_ms": latency_budget_ms,
+    }
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        for name in front:
+            if name in models:
+                models[name].save(os.path.join(output_dir, f"{name}.npz"))
+        with open(os.path.join(output_dir, 'report.json'), 'w') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def _print_report(report: dict):
+    print(f"{'variant':<28}{'acc %':>8}{'fidel %':>9}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'batch us/row':>14}{'nodes':>9}  pareto")
+    for record in sorted(report["variants"], key=lambda r: r["row_p99_ms"]):
+        print(f"{record['name']:<28}{record['accuracy'] * 100:>8.2f}"
+              f"{record.get('fidelity', 1.0) * 100:>9.2f}{record['row_p50_ms']:>9.3f}"
+              f"{record['row_p99_ms']:>9.3f}{record['batch_us_per_row']:>14.2f}"
+              f"{record.get('nodes', ''):>9}  {'*' if record['pareto'] else ''}")
+    if report["keep_original"]:
+        print(f"Recommended for p99 <= {report['latency_budget_ms']} ms: "
+              f"keep the full model (leave MODEL_TIER unset)")
+    elif report["latency_budget_ms"]:
+        print(f"Recommended tier for p99 <= {report['latency_budget_ms']} ms: "
+              f"{report['recommended'] or 'none'}")
+
+
+def _int_list(value: str) -> tuple:
+    return tuple(int(item) for item in value.split(',') if item)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('model_path', help='Trained sklearn forest saved with joblib')
+    parser.add_argument('--output-dir', default=None,
+                        help='Directory for Pareto-optimal tiers (default: Config.MODEL_TIERS_DIR)')
+    parser.add_argument('--latency-budget-ms', type=float, default=None,
+                        help='Single-row p99 budget used to recommend a tier')
+    parser.add_argument('--trees', type=_int_list, default=DEFAULT_TREE_COUNTS,
+                        help='Comma-separated tree counts to try')
+    parser.add_argument('--depths', type=_int_list, default=DEFAULT_DEPTHS,
+                        help='Comma-separated depth caps to try')
+    parser.add_argument('--config', default='default', help='Config name for DataService')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    args = parser.parse_args(argv)
+
+    app_config = config[args.config]
+    teacher = load(args.model_path)
+    features, labels = DataService(app_config).get_training_data()
+    report = run_search(teacher, features, labels,
+                        output_dir=args.output_dir or app_config.MODEL_TIERS_DIR,
+                        latency_budget_ms=args.latency_budget_ms,
+                        tree_counts=args.trees, depths=args.depths)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())